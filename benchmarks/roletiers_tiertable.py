@@ -0,0 +1,127 @@
+"""
+Benchmarks RoleTiers' TierTable against the original per-member tier loop on a synthetic 100k-member guild.
+
+Usage: python benchmarks/roletiers_tiertable.py [tiers] [members]
+"""
+
+import sys
+import time
+import random
+import asyncio
+import importlib.util
+from pathlib import Path
+from datetime import datetime, timedelta
+
+# Load tiertable.py directly, so the cog package (and discord) are not imported
+_spec = importlib.util.spec_from_file_location("tiertable", Path(__file__).resolve().parent.parent / "roletiers" / "tiertable.py")
+_tiertable = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(_tiertable)
+TierTable = _tiertable.TierTable
+
+
+class Role:
+    def __init__(self, role_id: int):
+        self.id = role_id
+
+    def __repr__(self):
+        return f"Role({self.id})"
+
+
+async def _seconds_since(time: datetime):
+    return (datetime.utcnow() - time).total_seconds()
+
+
+# The tier check from RoleTiers._tier_checker before TierTable, which awaited the time since join once per tier
+async def old_check(guild_tiers, member_roles, messages, joined_at):
+    member_roles = [r.id for r in member_roles]
+    member_tier_roles, new_tier = [], None
+
+    for tier in reversed(guild_tiers):
+        if tier["role"].id in member_roles:
+            if tier["role"] not in member_tier_roles:
+                member_tier_roles.append(tier["role"])
+        elif (
+                not new_tier and
+                not member_tier_roles and
+                ((await _seconds_since(joined_at)) / 3600 >= tier["hours"]) and
+                (messages >= tier["messages"])
+        ):
+            new_tier = tier
+
+    return member_tier_roles, new_tier
+
+
+# The tier check from RoleTiers._check_member, which awaits the time since join once per member
+async def new_check(table, member_roles, messages, joined_at):
+    return table.evaluate((r.id for r in member_roles), {None: messages}, (await _seconds_since(joined_at)) / 3600)
+
+
+def _joined(hours: float) -> datetime:
+    return datetime.utcnow() - timedelta(hours=hours)
+
+
+async def check_equivalent(roles, trials=3000, members=30):
+    for _ in range(trials):
+        monotonic = random.random() < 0.5
+        tiers, messages, hours = [], 0, 0
+        for _ in range(random.randint(1, 8)):  # RoleTiers never evaluates an empty table
+            if monotonic:
+                messages, hours = messages + random.randint(0, 50), hours + random.randint(0, 48)
+            else:
+                messages, hours = random.randint(0, 300), random.randint(0, 300)
+            tiers.append({"role": random.choice(roles[:12]), "messages": messages, "hours": hours, "remove": True})
+
+        table = TierTable(tiers)
+        for _ in range(members):
+            member_roles = random.sample(roles, random.randint(0, 6))
+            messages, joined_at = random.randint(0, 400), _joined(random.uniform(0, 400))
+            old_roles, old_new = await old_check(tiers, member_roles, messages, joined_at)
+            new_roles, new_new, _ = await new_check(table, member_roles, messages, joined_at)
+            assert old_new is new_new, (tiers, member_roles, messages, joined_at)
+            assert set(old_roles) == set(new_roles), (tiers, member_roles, messages, joined_at)
+
+
+async def timed(tiers, members):
+    table = TierTable(tiers)
+
+    start = time.perf_counter()
+    for member_roles, messages, joined_at in members:
+        await old_check(tiers, member_roles, messages, joined_at)
+    old_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for member_roles, messages, joined_at in members:
+        await new_check(table, member_roles, messages, joined_at)
+    new_time = time.perf_counter() - start
+
+    return table, old_time, new_time
+
+
+async def main():
+    tier_count = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    member_count = int(sys.argv[2]) if len(sys.argv) > 2 else 100_000
+
+    random.seed(1)
+    roles = [Role(i) for i in range(1, max(40, tier_count + 1))]
+
+    await check_equivalent(roles)
+    print("TierTable matches the original loop")
+
+    # Members hold ~8 roles each, and tier thresholds rise up the hierarchy
+    tiers = [{"role": roles[i], "messages": 100 * (i+1), "hours": 24 * (i+1), "remove": True} for i in range(tier_count)]
+    members = [(random.sample(roles, 8), random.randint(0, 100 * (tier_count+2)), _joined(random.uniform(0, 24 * (tier_count+2)))) for _ in range(member_count)]
+
+    table, old_time, new_time = await timed(tiers, members)
+    assert table.monotonic
+    print(f"{member_count} members, {tier_count} monotonic tiers: old {old_time:.3f}s, new {new_time:.3f}s ({old_time / new_time:.1f}x)")
+
+    if tier_count >= 7:
+        shuffled = list(tiers)
+        shuffled[3], shuffled[6] = shuffled[6], shuffled[3]
+        table, old_time, new_time = await timed(shuffled, members)
+        assert not table.monotonic
+        print(f"{member_count} members, {tier_count} non-monotonic tiers: old {old_time:.3f}s, new {new_time:.3f}s ({old_time / new_time:.1f}x)")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -7,4 +7,6 @@ with open(Path(__file__).parent / "info.json") as fp:
 
 
 async def setup(bot):
-    bot.add_cog(Counting(bot))
+    cog = Counting(bot)
+    await cog.initialize()
+    bot.add_cog(cog)
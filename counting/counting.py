@@ -22,12 +22,32 @@ OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 SOFTWARE.
 """
 
+import time
+import heapq
+import typing
+import asyncio
+import logging
 import datetime
-from copy import copy
+from copy import copy, deepcopy
+from collections import OrderedDict
 
 import discord
+from discord.ext import tasks
+from .leaderboard import Leaderboard
 from redbot.core import commands, Config
 
+log = logging.getLogger("red.ob13-cogs.counting")
+
+# Bot-deleted messages are forgotten after this many seconds, or once this many are tracked
+DELETED_TTL = 300
+DELETED_MAX = 10000
+
+# Wrong-count tallies are forgotten once a user has not counted wrong for this many seconds
+WRONG_DECAY = 86400
+
+# Minimum number of seconds between moves of the latest-counter role
+ROLE_HANDOFF_INTERVAL = 5
+
 
 class Counting(commands.Cog):
     """
@@ -39,7 +59,7 @@ class Counting(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
         self.config = Config.get_conf(self, identifier=14000605, force_registration=True)
-        default_guild = {
+        self.default_guild = {
             "toggle": True,
             "channel": None,
             "counter": 0,
@@ -58,108 +78,286 @@ class Counting(commands.Cog):
         default_member = {
             "counts": 0
         }
-        self.config.register_guild(**default_guild)
+        self.config.register_guild(**self.default_guild)
         self.config.register_member(**default_member)
-        self.deleted = []
+        self.deleted: typing.OrderedDict[int, float] = OrderedDict()
+
+        # In-memory state (counters are written back to config by _config_cache)
+        self.guild_cache: typing.Dict[int, dict] = {}
+        self.counting_channels: typing.Dict[int, int] = {}
+        self.leaderboards: typing.Dict[int, Leaderboard] = {}
+        self._dirty_guilds: typing.Set[int] = set()
+        self._dirty_members: typing.Dict[int, typing.Set[int]] = {}
+
+        # Wrong-count tallies: {guild_id: {member_id: [tally, time of last wrong count]}}
+        self.wrong_counts: typing.Dict[int, typing.Dict[int, list]] = {}
+        self._dirty_wrong: typing.Set[int] = set()
+
+        # Per-channel message queues (heaps keyed by message ID) and the tasks draining them
+        self._count_queues: typing.Dict[int, list] = {}
+        self._count_workers: typing.Dict[int, asyncio.Task] = {}
+        self._tasks: typing.Set[asyncio.Task] = set()
+
+        # Latest-counter role: current holder, pending new holder and the per-guild handoff tasks
+        self._role_holders: typing.Dict[int, int] = {}
+        self._role_targets: typing.Dict[int, int] = {}
+        self._role_workers: typing.Dict[int, asyncio.Task] = {}
+
+        # Guilds whose counting channel history is being replayed
+        self._recounting: typing.Set[int] = set()
+
+    async def initialize(self):
+
+        # Cache config
+        now = time.time()
+        for guild_id, guild_settings in (await self.config.all_guilds()).items():
+            if wrong := guild_settings.pop("wrong", None):
+                self.wrong_counts[guild_id] = {int(member_id): [tally, now] for member_id, tally in wrong.items() if tally}
+            self._cache_guild(guild_id, guild_settings)
+        for guild_id, guild_members in (await self.config.all_members()).items():
+            self.leaderboards[guild_id] = Leaderboard({member_id: member_data["counts"] for member_id, member_data in guild_members.items()})
+
+        # Start loops
+        self._config_cache.start()
+
+    def cog_unload(self):
+        self._config_cache.cancel()
+        for task in list(self._tasks):
+            task.cancel()
+
+    def _cache_guild(self, guild_id: int, guild_settings: dict):
+        if old_settings := self.guild_cache.get(guild_id):
+            self.counting_channels.pop(old_settings["channel"], None)
+        self.guild_cache[guild_id] = guild_settings
+        if guild_settings["channel"]:
+            self.counting_channels[guild_settings["channel"]] = guild_id
+
+    def _guild_settings(self, guild_id: int) -> dict:
+        if not (guild_settings := self.guild_cache.get(guild_id)):
+            guild_settings = self.guild_cache[guild_id] = deepcopy(self.default_guild)
+        return guild_settings
+
+    async def _set(self, guild: discord.Guild, key: str, value):
+        await self.config.guild(guild).set_raw(key, value=value)
+        guild_settings = self._guild_settings(guild.id)
+        if key == "channel":
+            self.counting_channels.pop(guild_settings["channel"], None)
+            if value:
+                self.counting_channels[value] = guild.id
+        elif key == "role":
+            self._role_holders.pop(guild.id, None)
+        guild_settings[key] = value
+
+    def _members_group(self, guild_id: int):
+        # All of a guild's member data, written in one go by _config_cache (whose lock is also held while members are reset)
+        return self.config._get_base_group(Config.MEMBER, str(guild_id))
+
+    def _leaderboard_for(self, guild_id: int) -> Leaderboard:
+        if not (leaderboard := self.leaderboards.get(guild_id)):
+            leaderboard = self.leaderboards[guild_id] = Leaderboard()
+        return leaderboard
+
+    def _increment_counts(self, guild_id: int, member_id: int):
+        self._leaderboard_for(guild_id).increment(member_id)
+        self._dirty_members.setdefault(guild_id, set()).add(member_id)
+
+    def _add_wrong(self, guild_id: int, member_id: int) -> int:
+        now = time.time()
+        guild_wrong = self.wrong_counts.setdefault(guild_id, {})
+        if not (entry := guild_wrong.get(member_id)) or entry[1] < now - WRONG_DECAY:
+            entry = guild_wrong[member_id] = [0, now]
+        entry[0] += 1
+        entry[1] = now
+        self._dirty_wrong.add(guild_id)
+        return entry[0]
+
+    def _reset_wrong(self, guild_id: int, member_id: int):
+        if self.wrong_counts.get(guild_id, {}).pop(member_id, None):
+            self._dirty_wrong.add(guild_id)
+
+    def _mark_deleted(self, message_id: int):
+        now = time.monotonic()
+        self.deleted[message_id] = now
+
+        # Evict the oldest entries (their delete events never arrived)
+        while self.deleted and (len(self.deleted) > DELETED_MAX or next(iter(self.deleted.values())) < now - DELETED_TTL):
+            self.deleted.popitem(last=False)
+
+    def _create_task(self, coro) -> asyncio.Task:
+        task = asyncio.create_task(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._task_done)
+        return task
+
+    def _task_done(self, task: asyncio.Task):
+        self._tasks.discard(task)
+        if not task.cancelled() and (exc := task.exception()):
+            log.error("Error in Counting background task", exc_info=exc)
 
     @commands.Cog.listener("on_message")
     async def _message_listener(self, message: discord.Message):
-        if not message.guild:
-            return
-
-        guild_settings = await self.config.guild(message.guild).all()
 
         # Ignore these messages
         if (
-            message.channel.id != guild_settings["channel"] or  # Message not in counting channel
-            await self.bot.cog_disabled_in_guild(self, message.guild) or  # Cog disabled in guild
-            not guild_settings["toggle"] or  # Counting toggled off
+            not message.guild or  # Message not in a guild
+            message.channel.id not in self.counting_channels or  # Message not in a counting channel
             message.author.bot  # Message author is a bot
         ):
             return
 
-        permissions: discord.Permissions = message.channel.permissions_for(message.guild.me)
-        to_delete, incorrect = False, False
+        # Queue the message so counts in a channel are handled in message ID order
+        heapq.heappush(self._count_queues.setdefault(message.channel.id, []), (message.id, message))
+        if message.channel.id not in self._count_workers:
+            self._count_workers[message.channel.id] = self._create_task(self._count_worker(message.channel.id))
+
+    async def _count_worker(self, channel_id: int):
+        queue = self._count_queues[channel_id]
+        try:
+            while queue:
+                __, message = heapq.heappop(queue)
+                try:
+                    await self._handle_count(message)
+                except Exception:
+                    log.exception(f"Error while handling counting message {message.id}")
+        finally:
+            del self._count_workers[channel_id]
+            if not queue:
+                self._count_queues.pop(channel_id, None)
+
+    @staticmethod
+    def _check_count(message: discord.Message, guild_settings: dict) -> typing.Optional[typing.Tuple[bool, bool, typing.Optional[int]]]:
+        to_delete, incorrect, user_count = False, False, None
 
         # Incorrect number (delete)
         try:
             user_count = int(message.content.strip().split()[0])
             if not (user_count-1 == guild_settings["counter"]):
                 to_delete, incorrect = True, True
-        except ValueError:  # No number as first word of message
+        except (ValueError, IndexError):  # No number as first word of message
             if guild_settings["allowtext"]:
-                return
+                return None
             to_delete = True
 
         # User repeated and allow repeats is off (delete)
         if not guild_settings["allowrepeats"] and guild_settings["last"] == message.author.id:
             to_delete = True
 
-        if to_delete:
+        return to_delete, incorrect, user_count
 
-            if incorrect and guild_settings["autoreset"] and permissions.send_messages:
-                await self.config.guild(message.guild).counter.set(0)
-                await message.channel.send(
-                    guild_settings["autoreset"].replace(
-                        "{author}",
-                        message.author.mention
-                    ).replace(
-                        "{count}",
-                        str(user_count)
-                    ).replace(
-                        "{correct}",
-                        str(guild_settings["counter"]+1)
-                    )
-                )
-
-            if not guild_settings["delete"] or not permissions.manage_messages:
-                if guild_settings["react"] and permissions.add_reactions:
-                    await message.add_reaction("\N{CROSS MARK}")
-            else:
-                self.deleted.append(message.id)
-                msg_copy = copy(message)
-                await message.delete()
-
-            if all(guild_settings["penalty"]):
-                async with self.config.guild(message.guild).wrong() as wrong:
-                    wrong[str(message.author.id)] = wrong.get(str(message.author.id), 0) + 1
-                    if wrong[str(message.author.id)] >= guild_settings["penalty"][0] and message.author.id != message.guild.owner.id and not message.author.guild_permissions.administrator:
-                        try:
-                            channel_mute = self.bot.get_command("channelmute")
-                            msg_copy.author = message.guild.owner
-                            ctx = await self.bot.get_context(msg_copy)
-                            if channel_mute:
-                                await channel_mute(ctx=ctx, users=[message.author], time_and_reason={"duration": datetime.timedelta(seconds=guild_settings["penalty"][1]), "reason": "Counting: too many wrong counts"})
-                            wrong[str(message.author.id)] = 0
-                        except Exception:
-                            pass
+    async def _handle_count(self, message: discord.Message):
+        guild_settings = self._guild_settings(message.guild.id)
 
+        # Ignore these messages
+        if (
+            message.channel.id != guild_settings["channel"] or  # Message not in counting channel
+            await self.bot.cog_disabled_in_guild(self, message.guild) or  # Cog disabled in guild
+            not guild_settings["toggle"] or  # Counting toggled off
+            message.guild.id in self._recounting  # Channel history is being replayed
+        ):
             return
 
-        if guild_settings["react"] and permissions.add_reactions:
-            await message.add_reaction("\N{WHITE HEAVY CHECK MARK}")
+        # Validate & commit the count without awaiting, then hand off the Discord API calls
+        permissions: discord.Permissions = message.channel.permissions_for(message.guild.me)
+        if not (checked := self._check_count(message, guild_settings)):
+            return
+        to_delete, incorrect, user_count = checked
 
-        async with self.config.guild(message.guild).all() as guild_config:
-            guild_config["last"] = message.author.id
-            guild_config["counter"] += 1
-            if guild_config["counter"] > guild_config["highscore"]:
-                guild_config["highscore"] = guild_config["counter"]
+        if to_delete:
+            correct = guild_settings["counter"] + 1
+            reset = bool(incorrect and guild_settings["autoreset"] and permissions.send_messages)
+            if reset:
+                guild_settings["counter"] = 0
+                self._dirty_guilds.add(message.guild.id)
+            self._create_task(self._wrong_count(message, permissions, user_count, correct, reset))
+            return
 
-        async with self.config.member(message.author).all() as member_settings:
-            member_settings["counts"] += 1
+        guild_settings["last"] = message.author.id
+        guild_settings["counter"] += 1
+        if guild_settings["counter"] > guild_settings["highscore"]:
+            guild_settings["highscore"] = guild_settings["counter"]
+        self._dirty_guilds.add(message.guild.id)
+        self._increment_counts(message.guild.id, message.author.id)
 
         # Assign a role the latest user to count if toggled
         if guild_settings["assignrole"] and guild_settings["role"] and permissions.manage_roles:
-            role = message.guild.get_role(guild_settings["role"])
-            if role and role < message.guild.me.top_role:
-                assigned = False
-                for m in role.members:
-                    if m.id == message.author.id:
-                        assigned = True
-                    else:
-                        await m.remove_roles(role, reason="Counter: no longer the latest user to count")
-                if not assigned:
-                    await message.author.add_roles(role, reason="Counter: latest user to count")
+            self._role_targets[message.guild.id] = message.author.id
+            if message.guild.id not in self._role_workers:
+                self._role_workers[message.guild.id] = self._create_task(self._role_handoff_worker(message.guild.id))
+
+        if guild_settings["react"] and permissions.add_reactions:
+            self._create_task(message.add_reaction("\N{WHITE HEAVY CHECK MARK}"))
+
+    async def _wrong_count(self, message: discord.Message, permissions: discord.Permissions, user_count: int, correct: int, reset: bool):
+        guild_settings = self._guild_settings(message.guild.id)
+
+        if reset:
+            await message.channel.send(
+                guild_settings["autoreset"].replace(
+                    "{author}",
+                    message.author.mention
+                ).replace(
+                    "{count}",
+                    str(user_count)
+                ).replace(
+                    "{correct}",
+                    str(correct)
+                )
+            )
+
+        if not guild_settings["delete"] or not permissions.manage_messages:
+            if guild_settings["react"] and permissions.add_reactions:
+                await message.add_reaction("\N{CROSS MARK}")
+        else:
+            self._mark_deleted(message.id)
+            msg_copy = copy(message)
+            await message.delete()
+
+        if all(guild_settings["penalty"]):
+            wrong = self._add_wrong(message.guild.id, message.author.id)
+            if wrong >= guild_settings["penalty"][0] and message.author.id != message.guild.owner.id and not message.author.guild_permissions.administrator:
+                try:
+                    channel_mute = self.bot.get_command("channelmute")
+                    msg_copy.author = message.guild.owner
+                    ctx = await self.bot.get_context(msg_copy)
+                    if channel_mute:
+                        await channel_mute(ctx=ctx, users=[message.author], time_and_reason={"duration": datetime.timedelta(seconds=guild_settings["penalty"][1]), "reason": "Counting: too many wrong counts"})
+                    self._reset_wrong(message.guild.id, message.author.id)
+                except Exception:
+                    pass
+
+    async def _role_handoff_worker(self, guild_id: int):
+        try:
+            # Move the role at most once per interval, to whoever counted last
+            while (member_id := self._role_targets.pop(guild_id, None)) is not None:
+                await self._hand_off_role(guild_id, member_id)
+                await asyncio.sleep(ROLE_HANDOFF_INTERVAL)
+        finally:
+            del self._role_workers[guild_id]
+
+    async def _hand_off_role(self, guild_id: int, member_id: int):
+        guild_settings = self._guild_settings(guild_id)
+        if (
+                not (guild := self.bot.get_guild(guild_id)) or  # Bot no longer in guild
+                not (role := guild.get_role(guild_settings["role"])) or  # Role not found
+                role >= guild.me.top_role  # Role above bot in hierarchy
+        ):
+            return
+
+        # Only scan the role's members if the current holder is not known yet
+        if (holder_id := self._role_holders.get(guild_id)) is None:
+            holders = role.members
+        else:
+            holders = [holder] if (holder := guild.get_member(holder_id)) else []
+
+        for m in holders:
+            if m.id != member_id and role in m.roles:
+                await m.remove_roles(role, reason="Counter: no longer the latest user to count")
+        self._role_holders.pop(guild_id, None)
+
+        if member := guild.get_member(member_id):
+            if role not in member.roles:
+                await member.add_roles(role, reason="Counter: latest user to count")
+            self._role_holders[guild_id] = member_id
 
     @commands.Cog.listener("on_message_delete")
     async def _message_deletion_listener(self, message: discord.Message):
@@ -167,19 +365,21 @@ class Counting(commands.Cog):
         # Ignore these messages
         if (
                 not message.guild or  # Message not in a guild
-                message.channel.id != (await self.config.guild(message.guild).channel()) or  # Message not in counting channel
+                message.channel.id not in self.counting_channels or  # Message not in counting channel
                 await self.bot.cog_disabled_in_guild(self, message.guild) or  # Cog disabled in guild
-                not await self.config.guild(message.guild).toggle() or  # Counting toggled off
+                not self._guild_settings(message.guild.id)["toggle"] or  # Counting toggled off
                 message.author.bot or  # Message author is a bot
                 not message.channel.permissions_for(message.guild.me).send_messages  # Cannot send message
         ):
             return
 
+        # Message was deleted by the bot
+        if self.deleted.pop(message.id, None) is not None:
+            return
+
         # Also ignore these
         try:
             _ = int(message.content.strip().split()[0])
-            if message.id in self.deleted:
-                return self.deleted.remove(message.id)
         except ValueError:  # Message contains non-numerical characters
             return
 
@@ -195,6 +395,22 @@ class Counting(commands.Cog):
     async def _message_edit_listener(self, before: discord.Message, _):
         await self._message_deletion_listener(before)
 
+    @commands.is_owner()
+    @commands.command(name="countingstats", hidden=True)
+    async def _counting_stats(self, ctx: commands.Context):
+        """View the sizes of the in-memory Counting caches."""
+        stats = [
+            f"**Cached Servers:** {len(self.guild_cache)}",
+            f"**Counting Channels:** {len(self.counting_channels)}",
+            f"**Queued Counts:** {sum(len(q) for q in self._count_queues.values())}",
+            f"**Background Tasks:** {len(self._tasks)}",
+            f"**Pending Role Handoffs:** {len(self._role_targets)}",
+            f"**Tracked Deleted Messages:** {len(self.deleted)}",
+            f"**Ranked Members:** {sum(len(lb) for lb in self.leaderboards.values())}",
+            f"**Wrong-Count Tallies:** {sum(len(w) for w in self.wrong_counts.values())}"
+        ]
+        return await ctx.maybe_send_embed("\n".join(stats))
+
     @commands.guild_only()
     @commands.group(name="counting")
     async def _counting(self, ctx: commands.Context):
@@ -203,29 +419,40 @@ class Counting(commands.Cog):
     @_counting.command(name="highscore", aliases=["score"])
     async def _high_score(self, ctx: commands.Context):
         """Show the highest count reached in this server."""
-        return await ctx.maybe_send_embed(f"{ctx.guild.name}'s counting highscore is {await self.config.guild(ctx.guild).highscore()}!")
+        return await ctx.maybe_send_embed(f"{ctx.guild.name}'s counting highscore is {self._guild_settings(ctx.guild.id)['highscore']}!")
 
     @commands.bot_has_permissions(embed_links=True)
     @_counting.command(name="leaderboard", aliases=["top", "topcounters"])
-    async def _leaderboard(self, ctx: commands.Context):
+    async def _leaderboard(self, ctx: commands.Context, page: int = 1):
         """Show the Counting leaderboard in this server."""
-        members = await self.config.all_members(ctx.guild)
-        member_counts = sorted([(k, v["counts"]) for k, v in members.items()], key=lambda m: m[1], reverse=True)
+        leaderboard = self._leaderboard_for(ctx.guild.id)
+        pages = max((len(leaderboard) - 1) // 10 + 1, 1)
+        page = min(max(page, 1), pages)
 
         embed = discord.Embed(title="Counting Leaderboard", color=await ctx.embed_color())
-        if not member_counts or member_counts[0][1] == 0:
+        if not len(leaderboard):
             embed.description = "No users have counted yet."
         else:
-            embed.description = "```py\nCounts | User\n"
-            for member_id, counts in member_counts[:10]:
+            embed.description = "```py\nRank | Counts | User\n"
+            for rank, (member_id, counts) in enumerate(leaderboard.top((page - 1) * 10, page * 10), start=(page - 1) * 10 + 1):
                 try:
                     name = (ctx.guild.get_member(member_id) or (await ctx.bot.fetch_user(member_id))).display_name
                 except discord.HTTPException:
                     name = "Unknown"
-                embed.description += f"{str(counts).rjust(6)}   {name}\n"
+                embed.description += f"{str(rank).rjust(4)}   {str(counts).rjust(6)}   {name}\n"
             embed.description += "```"
+            embed.set_footer(text=f"Page {page}/{pages}")
         return await ctx.send(embed=embed)
 
+    @_counting.command(name="rank")
+    async def _rank(self, ctx: commands.Context, member: discord.Member = None):
+        """Show a user's Counting rank in this server."""
+        member = member or ctx.author
+        leaderboard = self._leaderboard_for(ctx.guild.id)
+        if not (rank := leaderboard.rank(member.id)):
+            return await ctx.maybe_send_embed(f"{member.display_name} has not counted yet.")
+        return await ctx.maybe_send_embed(f"{member.display_name} is ranked #{rank} of {len(leaderboard)} with {leaderboard.get(member.id)} counts.")
+
     @commands.guild_only()
     @commands.mod_or_permissions(manage_messages=True)
     @commands.group(name="countingset")
@@ -235,37 +462,37 @@ class Counting(commands.Cog):
     @_counting_set.command(name="toggle")
     async def _toggle(self, ctx: commands.Context, true_or_false: bool):
         """Toggle Counting in this server."""
-        await self.config.guild(ctx.guild).toggle.set(true_or_false)
+        await self._set(ctx.guild, "toggle", true_or_false)
         return await ctx.tick()
 
     @_counting_set.command(name="channel")
     async def _channel(self, ctx: commands.Context, channel: discord.TextChannel):
         """Set the Counting channel."""
-        await self.config.guild(ctx.guild).channel.set(channel.id)
+        await self._set(ctx.guild, "channel", channel.id)
         return await ctx.tick()
 
     @_counting_set.command(name="starting")
     async def _starting(self, ctx: commands.Context, num: int):
         """Set the counter to start off with."""
-        await self.config.guild(ctx.guild).counter.set(num)
+        await self._set(ctx.guild, "counter", num)
         return await ctx.tick()
 
     @_counting_set.command(name="allowtext")
     async def _allow_text(self, ctx: commands.Context, true_or_false: bool):
         """Set whether messages not starting with a number are allowed."""
-        await self.config.guild(ctx.guild).allowtext.set(true_or_false)
+        await self._set(ctx.guild, "allowtext", true_or_false)
         return await ctx.tick()
 
     @_counting_set.command(name="react")
     async def _react(self, ctx: commands.Context, true_or_false: bool):
         """Toggle whether ✓ and ✗ reactions should be added to messages."""
-        await self.config.guild(ctx.guild).react.set(true_or_false)
+        await self._set(ctx.guild, "react", true_or_false)
         return await ctx.tick()
 
     @_counting_set.command(name="delete")
     async def _delete(self, ctx: commands.Context, true_or_false: bool):
         """Toggle whether incorrect counts should be deleted."""
-        await self.config.guild(ctx.guild).delete.set(true_or_false)
+        await self._set(ctx.guild, "delete", true_or_false)
         return await ctx.tick()
 
     @_counting_set.command(name="autoreset")
@@ -278,7 +505,7 @@ class Counting(commands.Cog):
         - `{count}` for the wrong count number
         - `{correct}` for what the count should have been
         """
-        await self.config.guild(ctx.guild).autoreset.set(message)
+        await self._set(ctx.guild, "autoreset", message)
         return await ctx.tick()
 
     @commands.admin_or_permissions(manage_roles=True)
@@ -291,47 +518,134 @@ class Counting(commands.Cog):
         elif role >= ctx.guild.me.top_role:
             return await ctx.send("That role is above me in the role hierarchy!")
 
-        await self.config.guild(ctx.guild).role.set(role.id)
+        await self._set(ctx.guild, "role", role.id)
         return await ctx.tick()
 
     @_counting_set.command(name="assignrole")
     async def _assignrole(self, ctx: commands.Context, true_or_false: bool):
         """Toggle whether to assign a role to the most recent user to count (requires add/remove role perms)."""
-        if not await self.config.guild(ctx.guild).role():
+        if not self._guild_settings(ctx.guild.id)["role"]:
             return await ctx.send(f"Please set a role first using `{ctx.clean_prefix}counting role <role>`!")
-        await self.config.guild(ctx.guild).assignrole.set(true_or_false)
+        await self._set(ctx.guild, "assignrole", true_or_false)
         return await ctx.tick()
 
     @_counting_set.command(name="allowrepeats")
     async def _allow_repeats(self, ctx: commands.Context, true_or_false: bool):
         """Toggle whether users can count multiple times in a row."""
-        await self.config.guild(ctx.guild).allowrepeats.set(true_or_false)
+        await self._set(ctx.guild, "allowrepeats", true_or_false)
         return await ctx.tick()
 
     @_counting_set.command(name="penalty")
     async def _penalty(self, ctx: commands.Context, wrong: int = None, mute_time_in_seconds: int = None):
-        """Mute users for a specified amount of time if they count wrong x times in a row (leave both values empty to turn off, requires Core `mutes` to be loaded)."""
-        await self.config.guild(ctx.guild).penalty.set((wrong, mute_time_in_seconds))
+        """Mute users for a specified amount of time if they count wrong x times in a row, within a day of each other (leave both values empty to turn off, requires Core `mutes` to be loaded)."""
+        await self._set(ctx.guild, "penalty", (wrong, mute_time_in_seconds))
         return await ctx.tick()
 
+    @commands.admin_or_permissions(administrator=True)
+    @_counting_set.command(name="recount", hidden=True)
+    async def _recount(self, ctx: commands.Context, enter_true_to_confirm: bool, starting: int = 0):
+        """
+        Rebuild the counter, highscore and user counts by replaying the Counting channel history.
+
+        `starting` is the number the counter was at before the first message in the channel. Counting is paused in this server while the history is replayed, and all current counts are replaced.
+        """
+        if not enter_true_to_confirm:
+            return await ctx.send("Please enter `true` to confirm this action!")
+
+        guild_settings = self._guild_settings(ctx.guild.id)
+        if not (channel := ctx.guild.get_channel(guild_settings["channel"])):
+            return await ctx.send("The Counting channel has not been set up yet!")
+        if not channel.permissions_for(ctx.guild.me).read_message_history:
+            return await ctx.send(f"I do not have permissions to read the message history of {channel.mention}!")
+        if ctx.guild.id in self._recounting:
+            return await ctx.send("A recount is already running in this server!")
+
+        self._recounting.add(ctx.guild.id)
+        try:
+            progress = await ctx.send(f"Replaying the history of {channel.mention}...")
+            state = {**guild_settings, "counter": starting, "highscore": starting, "last": None}
+            counts: typing.Dict[int, int] = {}
+            scanned, start = 0, time.perf_counter()
+            last_update = start
+
+            # Replay the counting rules over the channel history (oldest first)
+            async for message in channel.history(limit=None, oldest_first=True):
+                scanned += 1
+
+                if not message.author.bot and (checked := self._check_count(message, state)):
+                    to_delete, incorrect, __ = checked
+                    if not to_delete:
+                        state["last"] = message.author.id
+                        state["counter"] += 1
+                        state["highscore"] = max(state["highscore"], state["counter"])
+                        counts[message.author.id] = counts.get(message.author.id, 0) + 1
+                    elif incorrect and state["autoreset"]:
+                        state["counter"] = 0
+
+                if (now := time.perf_counter()) - last_update >= 10:
+                    last_update = now
+                    await progress.edit(content=f"Replaying the history of {channel.mention}... {scanned} messages scanned ({round(scanned / (now - start))} messages/s).")
+
+            # Write everything back at once (member counts first, restored if the guild write fails), holding the member flush's lock until memory matches
+            members_group = self._members_group(ctx.guild.id)
+            guild_config = self.config.guild(ctx.guild)
+            async with members_group.get_lock():
+                old_members = await members_group()
+                try:
+                    await members_group.set({str(member_id): {"counts": c} for member_id, c in counts.items()})
+                    await guild_config.counter.set(state["counter"])
+                    await guild_config.highscore.set(state["highscore"])
+                    await guild_config.last.set(state["last"])
+                except Exception:
+                    log.exception(f"Error while saving Counting recount for guild {ctx.guild.id}")
+                    self._dirty_guilds.add(ctx.guild.id)  # Rewrite the unchanged counters from memory
+                    try:
+                        await members_group.set(old_members)
+                    except Exception:
+                        log.exception(f"Error while restoring Counting member counts for guild {ctx.guild.id}")
+                    return await progress.edit(content=f"Recount failed while saving after {scanned} messages scanned; the counter and scores were not changed.")
+
+                guild_settings["counter"] = state["counter"]
+                guild_settings["highscore"] = state["highscore"]
+                guild_settings["last"] = state["last"]
+                self.leaderboards[ctx.guild.id] = Leaderboard(counts)
+                self._dirty_guilds.discard(ctx.guild.id)
+                self._dirty_members.pop(ctx.guild.id, None)
+        finally:
+            self._recounting.discard(ctx.guild.id)
+
+        elapsed = time.perf_counter() - start
+        return await progress.edit(content=f"Recount complete: {scanned} messages scanned in {round(elapsed, 1)}s ({round(scanned / max(elapsed, 0.001))} messages/s). The counter is now {state['counter']} (highscore {state['highscore']}) with {len(counts)} users counted.")
+
     @_counting_set.command(name="resetcounts")
     async def _reset_counts(self, ctx: commands.Context):
         """Reset the current Counting scores for all server members."""
-        await self.config.clear_all_members(ctx.guild)
+        async with self._members_group(ctx.guild.id).get_lock():
+            await self.config.clear_all_members(ctx.guild)
+            self.leaderboards.pop(ctx.guild.id, None)
+            self._dirty_members.pop(ctx.guild.id, None)
         return await ctx.tick()
 
     @_counting_set.command(name="clear")
     async def _clear(self, ctx: commands.Context):
         """Clear & reset the current Counting settings."""
         await self.config.guild(ctx.guild).clear()
-        await self.config.clear_all_members(ctx.guild)
+        async with self._members_group(ctx.guild.id).get_lock():
+            await self.config.clear_all_members(ctx.guild)
+            self.leaderboards.pop(ctx.guild.id, None)
+            self._dirty_members.pop(ctx.guild.id, None)
+        self._cache_guild(ctx.guild.id, deepcopy(self.default_guild))
+        self._role_holders.pop(ctx.guild.id, None)
+        self.wrong_counts.pop(ctx.guild.id, None)
+        self._dirty_guilds.discard(ctx.guild.id)
+        self._dirty_wrong.discard(ctx.guild.id)
         return await ctx.tick()
 
     @commands.bot_has_permissions(embed_links=True)
     @_counting_set.command(name="view")
     async def _view(self, ctx: commands.Context):
         """View the current Counting settings."""
-        settings = await self.config.guild(ctx.guild).all()
+        settings = self._guild_settings(ctx.guild.id)
 
         channel_mention = None
         if settings["channel"] and (c := ctx.guild.get_channel(settings["channel"])):
@@ -356,3 +670,58 @@ class Counting(commands.Cog):
         ]
 
         return await ctx.send(embed=discord.Embed(title="Counting Settings", color=await ctx.embed_color(), description="\n".join(desc)))
+
+    @tasks.loop(minutes=1)
+    async def _config_cache(self):
+
+        # Write back guild counters (only these fields, so settings changed meanwhile are kept; kept dirty if the write fails)
+        dirty_guilds, self._dirty_guilds = self._dirty_guilds, set()
+        for guild_id in dirty_guilds:
+            guild_settings = self._guild_settings(guild_id)
+            guild_config = self.config.guild_from_id(guild_id)
+            try:
+                await guild_config.counter.set(guild_settings["counter"])
+                await guild_config.highscore.set(guild_settings["highscore"])
+                await guild_config.last.set(guild_settings["last"])
+            except Exception:
+                log.exception(f"Error while saving Counting settings for guild {guild_id}")
+                self._dirty_guilds.add(guild_id)
+
+        # Write back member counts (one write per guild, kept dirty if the write fails)
+        dirty_members, self._dirty_members = self._dirty_members, {}
+        for guild_id, member_ids in dirty_members.items():
+            try:
+                async with self._members_group(guild_id).all() as guild_members:
+                    if not (leaderboard := self.leaderboards.get(guild_id)):  # Counts were reset while waiting for the lock
+                        continue
+                    for member_id in member_ids:
+                        guild_members.setdefault(str(member_id), {})["counts"] = leaderboard.get(member_id)
+            except Exception:
+                log.exception(f"Error while saving Counting member counts for guild {guild_id}")
+                self._dirty_members.setdefault(guild_id, set()).update(member_ids)
+
+        # Evict decayed wrong-count tallies
+        cutoff = time.time() - WRONG_DECAY
+        for guild_id, guild_wrong in self.wrong_counts.items():
+            if stale := [member_id for member_id, (__, last) in guild_wrong.items() if last < cutoff]:
+                for member_id in stale:
+                    del guild_wrong[member_id]
+                self._dirty_wrong.add(guild_id)
+
+        # Write back wrong-count tallies
+        dirty_wrong, self._dirty_wrong = self._dirty_wrong, set()
+        for guild_id in dirty_wrong:
+            try:
+                await self.config.guild_from_id(guild_id).wrong.set({str(member_id): tally for member_id, (tally, __) in self.wrong_counts.get(guild_id, {}).items()})
+            except Exception:
+                log.exception(f"Error while saving Counting wrong-count tallies for guild {guild_id}")
+                self._dirty_wrong.add(guild_id)
+
+    @_config_cache.before_loop
+    async def _before_config_cache(self):
+        await self.bot.wait_until_red_ready()
+
+    @_config_cache.after_loop
+    async def _after_config_cache(self):
+        if self._config_cache.is_being_cancelled():
+            await self._config_cache.coro(self)
@@ -0,0 +1,41 @@
+import typing
+from bisect import bisect_left, insort
+
+
+class Leaderboard:
+    def __init__(self, counts: typing.Dict[int, int] = None):
+        self.counts: typing.Dict[int, int] = {}
+        self.ranking: typing.List[typing.Tuple[int, int]] = []  # Sorted (-counts, member_id)
+        self.initialize(counts or {})
+
+    def initialize(self, counts: typing.Dict[int, int]):
+        self.counts = dict(counts)
+        self.ranking = sorted((-c, member_id) for member_id, c in self.counts.items() if c > 0)
+
+    def get(self, member_id: int) -> int:
+        return self.counts.get(member_id, 0)
+
+    def set(self, member_id: int, counts: int):
+        if old := self.counts.get(member_id, 0):
+            del self.ranking[bisect_left(self.ranking, (-old, member_id))]
+        self.counts[member_id] = counts
+        if counts > 0:
+            insort(self.ranking, (-counts, member_id))
+        return counts
+
+    def increment(self, member_id: int, value: int = 1):
+        return self.set(member_id, self.get(member_id) + value)
+
+    def top(self, start: int = 0, stop: int = 10) -> typing.List[typing.Tuple[int, int]]:
+        return [(member_id, -c) for c, member_id in self.ranking[start:stop]]
+
+    def rank(self, member_id: int) -> typing.Optional[int]:
+        if not (counts := self.counts.get(member_id, 0)) > 0:
+            return None
+        return bisect_left(self.ranking, (-counts, member_id)) + 1
+
+    def items(self):
+        return self.counts.items()
+
+    def __len__(self):
+        return len(self.ranking)
@@ -0,0 +1,34 @@
+import time
+import random
+import typing
+
+
+class CircuitBreaker:
+    def __init__(self, threshold: int, base: float, maximum: float):
+        self.threshold: int = threshold  # Consecutive failures before opening
+        self.base: float = base
+        self.maximum: float = maximum
+        self.failures: typing.Dict[typing.Hashable, int] = {}
+        self.open_until: typing.Dict[typing.Hashable, float] = {}
+
+    def is_open(self, key) -> bool:
+        return self.open_until.get(key, 0) > time.time()
+
+    def failure(self, key, retry_after: float = None):
+        failures = self.failures[key] = self.failures.get(key, 0) + 1
+        if failures < self.threshold and retry_after is None:
+            return
+
+        # Back off exponentially (with jitter) for each failure past the threshold, for at least as long as asked
+        delay = min(self.base * 2 ** max(failures - self.threshold, 0), self.maximum) * random.uniform(0.5, 1.5)
+        if retry_after is not None:
+            delay = max(delay, retry_after)
+        self.open_until[key] = time.time() + delay
+
+    def success(self, key):
+        self.failures.pop(key, None)
+        self.open_until.pop(key, None)
+
+    def open_count(self) -> int:
+        now = time.time()
+        return sum(1 for until in self.open_until.values() if until > now)
@@ -0,0 +1,103 @@
+import typing
+import calendar
+from html import escape
+from bisect import bisect_left
+from datetime import datetime, timezone
+
+TIME_FORMAT = "%Y-%m-%dT%H:%M:%SZ"
+
+
+class FeedEntry:
+    __slots__ = ("title", "link", "author", "icon", "content", "time")
+
+    def __init__(self, title: str, link: str, author: str, icon: str, content: str, time: float):
+        self.title: str = title
+        self.link: str = link
+        self.author: str = author
+        self.icon: str = icon  # Author avatar URL
+        self.content: str = content  # HTML
+        self.time: float = time  # Epoch seconds
+
+    @classmethod
+    def from_parsed(cls, entry):
+        if entry.get("updated_parsed"):
+            entry_time = calendar.timegm(entry.updated_parsed)
+        else:
+            entry_time = datetime.strptime(entry.updated, TIME_FORMAT).replace(tzinfo=timezone.utc).timestamp()
+
+        return cls(
+            title=entry.title,
+            link=entry.link,
+            author=entry.author,
+            icon=entry.media_thumbnail[0]["url"],
+            content=entry.content[0].value,
+            time=entry_time
+        )
+
+    @staticmethod
+    def _webhook_time(timestamp: str) -> float:
+        return datetime.fromisoformat(timestamp.replace("Z", "+00:00")).timestamp()
+
+    @classmethod
+    def from_push_commit(cls, commit: dict, icon: str):
+        return cls(
+            title=commit["message"].split("\n", 1)[0],
+            link=commit["url"],
+            author=commit["author"].get("username") or commit["author"]["name"],
+            icon=icon,
+            content=commit["message"],
+            time=cls._webhook_time(commit["timestamp"])
+        )
+
+    @classmethod
+    def from_release(cls, release: dict):
+        return cls(
+            title=release["name"] or release["tag_name"],
+            link=release["html_url"],
+            author=release["author"]["login"],
+            icon=release["author"]["avatar_url"],
+            content=escape(release["body"] or "").replace("\n", "<br>\n"),
+            time=cls._webhook_time(release["published_at"])
+        )
+
+
+class ParsedFeed:
+    def __init__(self, entries: typing.List[FeedEntry], link: str, user: str, repo: str, branch: typing.Optional[str]):
+        self.entries: typing.List[FeedEntry] = entries  # Newest first
+        self.link: str = link
+        self.user: str = user
+        self.repo: str = repo
+        self.branch: typing.Optional[str] = branch
+
+        # Negated times ascend (if entries are newest first), so entries newer than a time can be binary searched
+        self._keys: typing.List[float] = [-e.time for e in entries]
+        self._ordered: bool = all(self._keys[i] <= self._keys[i+1] for i in range(len(entries) - 1))
+
+    @classmethod
+    def from_webhook(cls, event: str, payload: dict):
+        # Build a feed from a GitHub push or release webhook payload (None for other events, e.g. tag pushes)
+        repository = payload["repository"]
+        user, repo = repository["owner"].get("login") or repository["owner"]["name"], repository["name"]
+
+        if event == "push" and payload["ref"].startswith("refs/heads/") and payload.get("commits"):
+            branch = payload["ref"][len("refs/heads/"):]
+            icon = payload["sender"]["avatar_url"]
+            entries = [FeedEntry.from_push_commit(commit, icon) for commit in reversed(payload["commits"])]
+            return cls(entries, f"https://github.com/{user}/{repo}/commits/{branch}", user, repo, branch)
+
+        if event == "release" and payload["action"] == "published":
+            return cls([FeedEntry.from_release(payload["release"])], f"https://github.com/{user}/{repo}/releases", user, repo, "releases")
+
+        return None
+
+    @property
+    def newest(self) -> typing.Optional[float]:
+        return self.entries[0].time if self.entries else None
+
+    # Returns the entries newer than last_time, oldest first
+    def new_entries(self, last_time: float) -> typing.List[FeedEntry]:
+        if self._ordered:
+            count = bisect_left(self._keys, -last_time)
+        else:
+            count = next((i for i, e in enumerate(self.entries) if e.time <= last_time), len(self.entries))
+        return self.entries[:count][::-1]
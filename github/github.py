@@ -23,23 +23,61 @@ SOFTWARE.
 """
 
 import re
+import hmac
+import json
+import time
+import heapq
+import random
 import typing
+import asyncio
 import aiohttp
+import hashlib
+import logging
+import secrets
 import html2text
 import feedparser
+from aiohttp import web
 from urllib.parse import urlparse
+from email.utils import parsedate_to_datetime
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone
 
 import discord
-from discord.ext import tasks
 from .converters import ExplicitNone
+from .feed import FeedEntry, ParsedFeed
+from .breaker import CircuitBreaker
 from redbot.core import commands, Config
 from redbot.core.utils import AsyncIter
 from redbot.core.utils.chat_formatting import escape, pagify
 
 # Constants
 COLOR = 0x7289da
-TIME_FORMAT = "%Y-%m-%dT%H:%M:%SZ"
+
+# Adaptive polling: feeds are polled at the base interval while they change, backing off exponentially to the max interval while they do not (minutes)
+DEFAULT_INTERVAL = 3
+DEFAULT_MAX_INTERVAL = 360
+POLL_BATCH_SECONDS = 15  # Feeds due within this many seconds of each other are polled together
+
+# Feed fetching: pooled connections (overall and per host) and the connect/read timeouts in seconds
+# Nearly all feeds are on github.com, so requests in flight are capped at the per-host limit rather than waiting (and timing out) in the pool
+FETCH_CONCURRENCY = 32
+FETCH_PER_HOST = 16
+FETCH_TIMEOUT = 20
+
+# Circuit breakers: consecutive failures before a host is paused, and the backoff range in seconds (per host and per feed)
+HOST_FAILURE_THRESHOLD = 3
+BACKOFF_BASE = 60
+BACKOFF_MAX = 6 * 60 * 60
+
+# Feed parsing and release note conversion run in worker threads: the number of threads, and the largest inputs accepted
+PARSE_WORKERS = 4
+MAX_FEED_BYTES = 2 * 1024 * 1024
+MAX_RELEASE_CHARS = 50000
+
+# Webhook receiver: the default address it listens on (behind a reverse proxy) and the largest payload accepted
+WEBHOOK_HOST = "127.0.0.1"
+WEBHOOK_MAX_BYTES = 5 * 1024 * 1024
+WEBHOOK_BIND_ATTEMPTS = 3  # On load, one second apart (the previous instance's listener closes in the background after a reload)
 
 # Regular expressions
 TOKEN_REGEX: re.Pattern = re.compile(r"token=(.*)")
@@ -53,6 +91,8 @@ LONG_RELEASE_REGEX: re.Pattern = re.compile(r"^<pre.*?>|</pre>$|(?<=\n)\n+")
 NO_ROLE = "You do not have the required role!"
 NOT_FOUND = "I could not find that feed."
 
+log = logging.getLogger("red.ob13-cogs.github")
+
 
 class GitHub(commands.Cog):
     """
@@ -66,7 +106,11 @@ class GitHub(commands.Cog):
         self.config = Config.get_conf(self, 14000605, force_registration=True)
 
         default_global = {
-            "interval": 3
+            "interval": DEFAULT_INTERVAL,
+            "max_interval": DEFAULT_MAX_INTERVAL,
+            "webhook_port": None,
+            "webhook_url": None,
+            "webhook_host": WEBHOOK_HOST
         }
         default_guild = {
             "channel": None,
@@ -85,21 +129,80 @@ class GitHub(commands.Cog):
         self.config.register_guild(**default_guild)
         self.config.register_member(**default_member)
 
-        self._github_rss.start()
+        # One pooled session for all fetches, and conditional request headers per feed URL ({url: headers})
+        self._session: aiohttp.ClientSession = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=FETCH_CONCURRENCY, limit_per_host=FETCH_PER_HOST),
+            timeout=aiohttp.ClientTimeout(sock_connect=FETCH_TIMEOUT, sock_read=FETCH_TIMEOUT)
+        )
+        self._validators: dict = {}
+        self._fetch_semaphore: asyncio.Semaphore = asyncio.Semaphore(FETCH_PER_HOST)
+
+        # Polling is paused for hosts failing with ratelimits/server errors, and for feeds failing in any way
+        self._host_breaker: CircuitBreaker = CircuitBreaker(HOST_FAILURE_THRESHOLD, BACKOFF_BASE, BACKOFF_MAX)
+        self._feed_breaker: CircuitBreaker = CircuitBreaker(1, BACKOFF_BASE, BACKOFF_MAX)
+
+        # Worker threads for CPU-bound parsing, and the time spent there (see [p]ghstats)
+        self._executor: ThreadPoolExecutor = ThreadPoolExecutor(max_workers=PARSE_WORKERS, thread_name_prefix="github-parse")
+        self._parse_stats: dict = {kind: {"count": 0, "total": 0.0, "max": 0.0} for kind in ("feed", "release")}
+
+        # Adaptive polling: per feed URL, its current interval, when it is next due and its newest entry, plus a heap of (due, url)
+        self._base_interval: float = DEFAULT_INTERVAL * 60
+        self._max_poll_interval: float = DEFAULT_MAX_INTERVAL * 60
+        self._polls: dict = {}
+        self._poll_queue: list = []
+        self._poll_event: asyncio.Event = asyncio.Event()
+        self._poll_task = None
+
+        # Feed registry ({guild_id: {member_id: {name: feed}}}, kept in sync with config) and feeds with time cursors to write
+        self._feeds: dict = {}
+        self._dirty_cursors: set = set()
+
+        # Webhook receiver (when enabled), and feeds with webhooks attached ({hook_id: (guild_id, member_id, name)})
+        self._webhook_runner = None
+        self._webhook_url = None
+        self._webhooks: dict = {}
+        self._webhook_tasks: set = set()
 
     def cog_unload(self):
-        self._github_rss.cancel()
+        if self._poll_task:
+            self._poll_task.cancel()
+        self.bot.loop.create_task(self._session.close())
+        self._executor.shutdown(wait=False)
+        if self._webhook_runner:
+            self.bot.loop.create_task(self._webhook_runner.cleanup())  # Stops listening as soon as it runs
 
     async def initialize(self):
         global_conf = await self.config.all()
 
-        # Change loop interval if necessary
-        if global_conf["interval"] != 3:
-            self._github_rss.change_interval(minutes=global_conf["interval"])
-
         # Check whether config migration is necessary
-        if global_conf.get("migrated"):
-            return
+        if not global_conf.get("migrated"):
+            await self._migrate()
+
+        # Load feed registry
+        for guild_id, guild_members in (await self.config.all_members()).items():
+            for member_id, member_data in guild_members.items():
+                if member_data["feeds"]:
+                    self._feeds.setdefault(guild_id, {})[member_id] = member_data["feeds"]
+                    self._index_webhooks(guild_id, member_id)
+
+        # Start webhook receiver (falling back to polling every feed if the port cannot be bound)
+        if global_conf["webhook_port"]:
+            for attempt in range(WEBHOOK_BIND_ATTEMPTS):
+                try:
+                    await self._start_webhooks(global_conf["webhook_host"], global_conf["webhook_port"], global_conf["webhook_url"])
+                    break
+                except OSError:
+                    if attempt < WEBHOOK_BIND_ATTEMPTS - 1:
+                        await asyncio.sleep(1)
+                    else:
+                        log.exception(f"Error while starting the GitHub webhook receiver on port {global_conf['webhook_port']}")
+                        await self._poll_webhook_feeds()
+
+        # Start polling
+        self._base_interval, self._max_poll_interval = global_conf["interval"] * 60, global_conf["max_interval"] * 60
+        self._poll_task = asyncio.create_task(self._poll_scheduler())
+
+    async def _migrate(self):
 
         # Loop through each guild
         for guild_id, guild_data in (await self.config.all_guilds()).items():
@@ -130,6 +233,51 @@ class GitHub(commands.Cog):
         async with self.config.all() as global_config:
             global_config["migrated"] = True
 
+    def _sync_feeds(self, guild_id: int, member_id: int, feeds: dict, renamed: tuple = None):
+        # Mirror a member's feeds config into the registry (keeping time cursors not yet written to config)
+        old = self._feeds.get(guild_id, {}).pop(member_id, {})
+        if renamed and renamed[0] in old:
+            old[renamed[1]] = old.pop(renamed[0])
+        if feeds:
+            self._feeds.setdefault(guild_id, {})[member_id] = {
+                name: {**feed, "time": max(feed["time"], old[name]["time"]) if name in old else feed["time"]}
+                for name, feed in feeds.items()
+            }
+        self._index_webhooks(guild_id, member_id)
+
+    def _index_webhooks(self, guild_id: int, member_id: int):
+        for hook_id in [h for h, (g, m, __) in self._webhooks.items() if g == guild_id and m == member_id]:
+            del self._webhooks[hook_id]
+        for name, feed in self._feeds.get(guild_id, {}).get(member_id, {}).items():
+            if webhook := feed.get("webhook"):
+                self._webhooks[webhook["id"]] = (guild_id, member_id, name)
+
+    def _advance_cursor(self, guild_id: int, member_id: int, name: str, new_time: float):
+        # Set the time cursor on the feed currently in the registry (_sync_feeds may have replaced the dict being checked or sent)
+        if feed := self._feeds.get(guild_id, {}).get(member_id, {}).get(name):
+            feed["time"] = max(feed["time"], new_time)
+            self._dirty_cursors.add((guild_id, member_id, name))
+
+    async def _flush_cursors(self):
+        # Write changed time cursors from the registry, one config write per member (under the same lock as the feed commands, setting only the times)
+        dirty, self._dirty_cursors = self._dirty_cursors, set()
+        by_member = {}
+        for guild_id, member_id, name in dirty:
+            by_member.setdefault((guild_id, member_id), []).append(name)
+
+        for (guild_id, member_id), names in by_member.items():
+            try:
+                async with self.config.member_from_ids(guild_id, member_id).feeds() as member_feeds:
+                    for name in names:
+                        if (
+                                (feed := self._feeds.get(guild_id, {}).get(member_id, {}).get(name)) and  # Feed still in registry
+                                (config_feed := member_feeds.get(name))  # Feed still in config
+                        ):
+                            config_feed["time"] = feed["time"]
+            except Exception:
+                log.exception(f"Error while saving GitHub feed times for member {member_id} in guild {guild_id}")
+                self._dirty_cursors.update((guild_id, member_id, name) for name in names)  # Keep for the next flush
+
     @staticmethod
     def _escape(text: str):
         return escape(text, formatting=True)
@@ -158,25 +306,116 @@ class GitHub(commands.Cog):
         else:
             return final_url + f"/commits.atom"
 
+    async def _fetch(self, url: str, valid_statuses: list, conditional: bool = False):
+        # If conditional, only fetch the feed if it has changed since its last conditional fetch (None if not)
+        async with self._session.get(url, headers=self._validators.get(url, {}) if conditional else {}) as resp:
+            if resp.status == 304 and conditional:
+                self._record_fetch(url, resp)
+                return None
+            if resp.status not in valid_statuses or not (html := await self._read_limited(resp, MAX_FEED_BYTES)):
+                self._record_fetch(url, resp, failed=True)
+                return False
+            self._record_fetch(url, resp)
+            validators = {
+                header: value
+                for header, response_header in (("If-None-Match", "ETag"), ("If-Modified-Since", "Last-Modified"))
+                if (value := resp.headers.get(response_header))
+            }
+
+        if not (parsed := await self._run_parser("feed", self._parse_feed, html)):
+            return False
+        entries, link = parsed
+        user, repo, branch, __ = await self._parse_url(link + ".atom")
+
+        # Only skip unchanged fetches once this version was parsed (the caller drops the validators if it fails to deliver it)
+        if conditional:
+            self._validators[url] = validators
+        return ParsedFeed(entries, link, user, repo, branch)
+
+    @staticmethod
+    def _parse_feed(html: bytes):
+        # Parse the feed and its entries (in a worker thread), skipping malformed entries
+        parsed = feedparser.parse(html)
+        if not (link := parsed.feed.get("link")):
+            return None
+
+        entries = []
+        for entry in parsed.entries:
+            try:
+                entries.append(FeedEntry.from_parsed(entry))
+            except (AttributeError, KeyError, IndexError, ValueError):
+                continue
+        return entries, link
+
+    @staticmethod
+    async def _read_limited(resp: aiohttp.ClientResponse, limit: int):
+        # Read the body unless it is larger than the limit (None if so)
+        body = bytearray()
+        async for chunk in resp.content.iter_chunked(65536):
+            body += chunk
+            if len(body) > limit:
+                return None
+        return bytes(body)
+
     @staticmethod
-    async def _fetch(url: str, valid_statuses: list):
-        async with aiohttp.ClientSession() as session:
-            async with session.get(url) as resp:
-                html = await resp.read()
-                if resp.status not in valid_statuses:
-                    return False
-        return feedparser.parse(html)
+    def _timed(func, *args):
+        start = time.perf_counter()
+        return func(*args), time.perf_counter() - start
+
+    async def _run_parser(self, kind: str, func, *args):
+        # Run in a worker thread, recording the time taken off the event loop
+        result, elapsed = await asyncio.get_running_loop().run_in_executor(self._executor, self._timed, func, *args)
+        stats = self._parse_stats[kind]
+        stats["count"] += 1
+        stats["total"] += elapsed
+        stats["max"] = max(stats["max"], elapsed)
+        return result
+
+    async def _fetch_limited(self, url: str, valid_statuses: list, conditional: bool = False):
+        # Skip the request while the host or feed is backing off (checked again once a slot frees up)
+        host = urlparse(url).netloc
+        if self._host_breaker.is_open(host) or self._feed_breaker.is_open(url):
+            return False
+
+        async with self._fetch_semaphore:
+            if self._host_breaker.is_open(host):
+                return False
+            try:
+                return await self._fetch(url, valid_statuses, conditional)
+            except (aiohttp.ClientError, asyncio.TimeoutError):
+                self._record_fetch(url, failed=True)
+                return False
+
+    def _record_fetch(self, url: str, resp: aiohttp.ClientResponse = None, failed: bool = False):
+        host = urlparse(url).netloc
+        if not failed:
+            self._host_breaker.success(host)
+            self._feed_breaker.success(url)
+            return
+
+        # Ratelimits, server errors and connection errors count against the host as well as the feed
+        retry_after = self._retry_after(resp.headers.get("Retry-After")) if resp else None
+        if not resp or resp.status == 429 or resp.status >= 500 or retry_after is not None:
+            self._host_breaker.failure(host, retry_after)
+        self._feed_breaker.failure(url, retry_after)
 
     @staticmethod
-    async def new_entries(entries, last_time):
-        entries_new = []
-        for e in entries:
-            e_time = datetime.strptime(e.updated, TIME_FORMAT).replace(tzinfo=timezone.utc).timestamp()
-            if e_time > last_time:
-                entries_new.insert(0, e)
-            else:
-                break
-        return entries_new, datetime.now(tz=timezone.utc)
+    def _retry_after(value: typing.Optional[str]) -> typing.Optional[float]:
+        # Retry-After is either a number of seconds or an HTTP date
+        if not value:
+            return None
+        try:
+            return max(float(value), 0)
+        except ValueError:
+            pass
+        try:
+            return max((parsedate_to_datetime(value) - datetime.now(tz=timezone.utc)).total_seconds(), 0)
+        except (TypeError, ValueError):
+            return None
+
+    @staticmethod
+    async def new_entries(feed: ParsedFeed, last_time):
+        return feed.new_entries(last_time), datetime.now(tz=timezone.utc)
 
     @staticmethod
     async def _parse_url(url: str):
@@ -223,11 +462,11 @@ class GitHub(commands.Cog):
             channel = None
         return channel
 
-    async def _commit_embeds(self, entries: list, feed_link: str, color: int, timestamp: bool, short: bool):
+    async def _commit_embeds(self, entries: typing.List[FeedEntry], feed: ParsedFeed, color: int, timestamp: bool, short: bool):
         if not entries:
             return None
 
-        user, repo, branch, __ = await self._parse_url(feed_link+".atom")
+        user, repo, branch = feed.user, feed.repo, feed.branch
 
         if branch == "releases":
             embed = discord.Embed(
@@ -236,7 +475,7 @@ class GitHub(commands.Cog):
                 url=entries[0].link
             )
             if not short:
-                embed.description = html2text.html2text(entries[0].content[0].value)
+                embed.description = (await self._run_parser("release", html2text.html2text, entries[0].content[:MAX_RELEASE_CHARS]))[:4096]
 
         else:
             num = min(len(entries), 10)
@@ -245,22 +484,22 @@ class GitHub(commands.Cog):
                 if short:
                     desc += f"[`{COMMIT_REGEX.fullmatch(e.link).group(1)[:7]}`]({e.link}) {self._escape(e.title)} – {self._escape(e.author)}\n"
                 else:
-                    desc += f"[`{COMMIT_REGEX.fullmatch(e.link).group(1)[:7]}`]({e.link}) – {self._escape(e.author)}\n{LONG_COMMIT_REGEX.sub('', e.content[0].value)}\n\n"
+                    desc += f"[`{COMMIT_REGEX.fullmatch(e.link).group(1)[:7]}`]({e.link}) – {self._escape(e.author)}\n{LONG_COMMIT_REGEX.sub('', e.content)}\n\n"
 
             embed = discord.Embed(
                 title=f"[{repo}:{branch}] {num} new commit{'s' if num > 1 else ''}",
                 color=color if color is not None else COLOR,
                 description=desc,
-                url=feed_link if num > 1 else entries[0].link
+                url=feed.link if num > 1 else entries[0].link
             )
 
         if timestamp:
-            embed.timestamp = datetime.strptime(entries[0].updated, TIME_FORMAT).replace(tzinfo=timezone.utc)
+            embed.timestamp = datetime.fromtimestamp(entries[0].time, tz=timezone.utc)
 
         embed.set_author(
             name=entries[0].author,
             url=f"https://github.com/{entries[0].author}",
-            icon_url=entries[0].media_thumbnail[0]["url"]
+            icon_url=entries[0].icon
         )
 
         return embed
@@ -269,13 +508,70 @@ class GitHub(commands.Cog):
     @commands.command(name="ghinterval", hidden=True)
     async def _interval(self, ctx: commands.Context, interval_in_minutes: int):
         """
-        Set the global fetch interval for GitHub.
+        Set the global base fetch interval for GitHub.
 
-        Depending on the size of your bot, you may want to modify the interval for which the bot fetches all feeds for updates (default is 3 minutes).
+        Depending on the size of your bot, you may want to modify the interval for which the bot fetches feeds for updates (default is 3 minutes). Feeds are fetched at this interval while they have new updates, and less often while they do not (see `[p]ghmaxinterval`).
         """
+        if interval_in_minutes < 1:
+            return await ctx.send("Please enter a positive integer!")
         await self.config.interval.set(interval_in_minutes)
-        self._github_rss.change_interval(minutes=interval_in_minutes)
-        return await ctx.send(f"I will now check for commit updates every {interval_in_minutes} minutes (change takes effect next loop).")
+        self._base_interval = interval_in_minutes * 60
+        return await ctx.send(f"I will now check active feeds for commit updates every {interval_in_minutes} minutes (change takes effect after each feed's next check).")
+
+    @commands.is_owner()
+    @commands.command(name="ghmaxinterval", hidden=True)
+    async def _max_interval(self, ctx: commands.Context, interval_in_minutes: int):
+        """
+        Set the global max fetch interval for GitHub.
+
+        Each time a feed is fetched with no updates, the time until it is fetched again doubles, up to this interval (default is 360 minutes).
+        """
+        if interval_in_minutes < 1:
+            return await ctx.send("Please enter a positive integer!")
+        await self.config.max_interval.set(interval_in_minutes)
+        self._max_poll_interval = interval_in_minutes * 60
+        return await ctx.send(f"I will now check inactive feeds for commit updates at least every {interval_in_minutes} minutes (change takes effect after each feed's next check).")
+
+    @commands.is_owner()
+    @commands.command(name="ghstats", hidden=True)
+    async def _stats(self, ctx: commands.Context):
+        """View GitHub parsing times (in worker threads) and fetch backoff status."""
+        stats = []
+        for kind, name in (("feed", "Feeds Parsed"), ("release", "Release Notes Converted")):
+            kind_stats = self._parse_stats[kind]
+            average = kind_stats["total"] / kind_stats["count"] if kind_stats["count"] else 0
+            stats.append(f"**{name}:** {kind_stats['count']} (total {round(kind_stats['total'], 2)}s, avg {round(average * 1000, 1)}ms, max {round(kind_stats['max'] * 1000, 1)}ms)")
+        stats.append(f"**Hosts Backing Off:** {self._host_breaker.open_count()}")
+        stats.append(f"**Feeds Backing Off:** {self._feed_breaker.open_count()}")
+        return await ctx.maybe_send_embed("\n".join(stats))
+
+    @commands.is_owner()
+    @commands.command(name="ghwebhook", hidden=True)
+    async def _webhook_server(self, ctx: commands.Context, port: int, public_url: str = None, host: str = WEBHOOK_HOST):
+        """
+        Set up the GitHub webhook receiver (enter port `0` to turn it off).
+
+        Once running, users can attach webhooks to their feeds with `[p]github webhook`, and those feeds will not be polled. The public URL is the address GitHub should send webhooks to (e.g. `https://bot.example.com`), which should forward to this port.
+
+        The receiver only listens on this machine (`127.0.0.1`) unless another host is entered (e.g. `0.0.0.0` to listen on all interfaces).
+        """
+        if port and not (public_url and 0 < port < 65536):
+            return await ctx.send("Please enter a valid port and the public URL for the receiver!")
+
+        await self._stop_webhooks()
+        if port:
+            try:
+                await self._start_webhooks(host, port, public_url)
+            except OSError as e:
+                await self._poll_webhook_feeds()
+                return await ctx.send(f"I could not start the webhook receiver: {e}")
+        else:
+            await self._poll_webhook_feeds()
+
+        async with self.config.all() as global_config:
+            global_config["webhook_port"], global_config["webhook_url"], global_config["webhook_host"] = port or None, public_url if port else None, host
+
+        return await ctx.send(f"The webhook receiver is now listening on {host}:{port}." if port else "The webhook receiver has been turned off, and all feeds will be polled.")
 
     @commands.guild_only()
     @commands.bot_has_permissions(embed_links=True)
@@ -359,7 +655,7 @@ class GitHub(commands.Cog):
         if channel and channel.permissions_for(ctx.guild.me).embed_links:
             return await channel.send(embed=await self._commit_embeds(
                 entries=[parsed.entries[0]],
-                feed_link=parsed.feed.link,
+                feed=parsed,
                 color=guild_config["color"],
                 timestamp=guild_config["timestamp"],
                 short=guild_config["short"]
@@ -371,7 +667,7 @@ class GitHub(commands.Cog):
     async def _force_all(self, ctx: commands.context):
         """Force a run of the GitHub feed fetching coroutine."""
         async with ctx.typing():
-            await self._github_rss.coro(self, guild_to_check=ctx.guild.id)
+            await self._github_rss(guild_to_check=ctx.guild.id)
         return await ctx.tick()
 
     @_github_set.command(name="rename")
@@ -386,6 +682,7 @@ class GitHub(commands.Cog):
                 return await ctx.send(NOT_FOUND)
 
             feeds[new_name] = feeds.pop(old_name)
+            self._sync_feeds(ctx.guild.id, user.id, feeds, renamed=(old_name, new_name))
 
         return await ctx.send("Feed successfully renamed.")
 
@@ -401,6 +698,7 @@ class GitHub(commands.Cog):
                 return await ctx.send(NOT_FOUND)
 
             feeds[feed_name]["channel"] = channel.id if channel else None
+            self._sync_feeds(ctx.guild.id, user.id, feeds)
 
         return await ctx.send("Feed channel successfully overridden.")
 
@@ -492,7 +790,7 @@ class GitHub(commands.Cog):
 
         return await ctx.send(embed=await self._commit_embeds(
             entries=parsed.entries[:entries] if entries else [parsed.entries[0]],
-            feed_link=parsed.feed.link,
+            feed=parsed,
             color=guild_config["color"],
             timestamp=guild_config["timestamp"],
             short=guild_config["short"]
@@ -549,18 +847,23 @@ class GitHub(commands.Cog):
                 "channel": None,
                 "time": datetime.now(tz=timezone.utc).timestamp()
             }
+            self._sync_feeds(ctx.guild.id, ctx.author.id, feeds)
 
         # Send confirmation
         if guild_config["notify"]:
             await channel.send(embed=discord.Embed(
                 color=discord.Color.green(),
-                description=f"[[{user_repo_branch_token['repo']}:{(await self._parse_url(parsed.feed.link+'.atom'))[2]}]]({await self._repo_url(**user_repo_branch_token)}) has been added by {ctx.author.mention}"
+                description=f"[[{user_repo_branch_token['repo']}:{parsed.branch}]]({await self._repo_url(**user_repo_branch_token)}) has been added by {ctx.author.mention}"
             ))
 
+        # Poll the feed from now on
+        if url not in self._polls:
+            self._schedule_poll(url, time.time() + self._base_interval)
+
         # Send last feed entry
         await channel.send(embed=await self._commit_embeds(
             entries=[parsed.entries[0]],
-            feed_link=parsed.feed.link,
+            feed=parsed,
             color=guild_config["color"],
             timestamp=guild_config["timestamp"],
             short=guild_config["short"]
@@ -583,6 +886,7 @@ class GitHub(commands.Cog):
             if not (to_remove := feeds.get(name)):
                 return await ctx.send(f"There is no feed with that name! Try checking your feeds with `{ctx.clean_prefix}github list`.")
             del feeds[name]
+            self._sync_feeds(ctx.guild.id, ctx.author.id, feeds)
 
         # Send confirmation
         if guild_config["notify"]:
@@ -594,6 +898,43 @@ class GitHub(commands.Cog):
 
         return await ctx.send("Feed successfully removed.")
 
+    @_github.command(name="webhook")
+    async def _webhook(self, ctx: commands.Context, name: str, true_or_false: bool):
+        """
+        Attach a GitHub webhook to one of your feeds.
+
+        Instead of being checked periodically, the feed will be updated as soon as GitHub sends a `push` or `release` event. I will DM you the payload URL and secret to add in your repository's webhook settings (content type `application/json`).
+        """
+
+        guild_config = await self.config.guild(ctx.guild).all()
+        if (role := guild_config["role"]) and role not in [r.id for r in ctx.author.roles]:
+            return await ctx.send(NO_ROLE)
+
+        if true_or_false and not self._webhook_runner:
+            return await ctx.send("The bot owner has not set up webhooks.")
+
+        name = self._escape(name)
+        webhook = {"id": secrets.token_urlsafe(16), "secret": secrets.token_hex(32)} if true_or_false else None
+
+        async with self.config.member(ctx.author).feeds() as feeds:
+            if name not in feeds:
+                return await ctx.send(NOT_FOUND)
+
+            if webhook:
+                try:
+                    await ctx.author.send(f"Set up a webhook for your `{name}` feed in your repository's settings with:\n**Payload URL:** {self._webhook_url.rstrip('/')}/github/{webhook['id']}\n**Content type:** `application/json`\n**Secret:** `{webhook['secret']}`\n**Events:** pushes and releases")
+                except discord.HTTPException:
+                    return await ctx.send("I could not DM you the webhook details! Please enable DMs from server members and try again.")
+
+            feeds[name]["webhook"] = webhook
+            self._sync_feeds(ctx.guild.id, ctx.author.id, feeds)
+
+            # The feed was skipped by polling while attached, so schedule it again now
+            if not webhook:
+                self._schedule_poll(await self._url_from_config(feeds[name]), time.time())
+
+        return await ctx.send("Webhook attached; check your DMs for the details." if webhook else "Webhook detached; the feed will be checked periodically again.")
+
     @_github.command(name="list")
     async def _list(self, ctx: commands.Context):
         """List your GitHub RSS feeds in the server."""
@@ -621,8 +962,99 @@ class GitHub(commands.Cog):
         for embed in embeds:
             await ctx.send(embed=embed)
 
-    @tasks.loop(minutes=3)
-    async def _github_rss(self, guild_to_check=None):
+    async def _start_webhooks(self, host: str, port: int, public_url: str):
+        app = web.Application(client_max_size=WEBHOOK_MAX_BYTES)
+        app.router.add_post("/github/{hook_id}", self._webhook_handler)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        try:
+            await web.TCPSite(runner, host, port).start()
+        except OSError:
+            await runner.cleanup()
+            raise
+        self._webhook_runner, self._webhook_url = runner, public_url
+
+    async def _stop_webhooks(self):
+        if self._webhook_runner:
+            await self._webhook_runner.cleanup()
+        self._webhook_runner = self._webhook_url = None
+
+    async def _poll_webhook_feeds(self):
+        # Feeds with webhooks are skipped by polling while the receiver runs, so schedule them once it is not
+        now = time.time()
+        for guild_feeds in self._feeds.values():
+            for member_feeds in guild_feeds.values():
+                for feed in member_feeds.values():
+                    if feed.get("webhook"):
+                        self._schedule_poll(await self._url_from_config(feed), now)
+
+    async def _webhook_handler(self, request: web.Request):
+        if not (feed_ids := self._webhooks.get(request.match_info["hook_id"])):
+            return web.Response(status=404)
+        guild_id, member_id, name = feed_ids
+        if not (feed := self._feeds.get(guild_id, {}).get(member_id, {}).get(name)) or not feed.get("webhook"):
+            return web.Response(status=404)
+
+        # Validate signature
+        body = await request.read()
+        signature = "sha256=" + hmac.new(feed["webhook"]["secret"].encode(), body, hashlib.sha256).hexdigest()
+        if not hmac.compare_digest(signature, request.headers.get("X-Hub-Signature-256", "")):
+            return web.Response(status=401)
+
+        if (event := request.headers.get("X-GitHub-Event", "")) == "ping":
+            return web.Response(status=200)
+
+        try:
+            payload = json.loads(body)
+            parsed = ParsedFeed.from_webhook(event, payload)
+        except (ValueError, KeyError, TypeError, AttributeError):
+            return web.Response(status=400)
+
+        # Send in the background so GitHub gets a quick response
+        if parsed and self._webhook_matches(feed, parsed, payload["repository"].get("default_branch")):
+            task = asyncio.create_task(self._webhook_send(guild_id, member_id, name, parsed))
+            self._webhook_tasks.add(task)
+            task.add_done_callback(self._webhook_tasks.discard)
+        return web.Response(status=202)
+
+    @staticmethod
+    def _webhook_matches(feed: dict, parsed: ParsedFeed, default_branch: str) -> bool:
+        if (feed["user"].lower(), feed["repo"].lower()) != (parsed.user.lower(), parsed.repo.lower()):
+            return False
+        if parsed.branch == "releases" or feed["branch"] == "releases":
+            return parsed.branch == feed["branch"]
+        return (feed["branch"] or default_branch) == parsed.branch  # No branch: pushes to the default branch
+
+    async def _webhook_send(self, guild_id: int, member_id: int, name: str, parsed: ParsedFeed):
+        try:
+            if not (guild := self.bot.get_guild(guild_id)) or await self.bot.cog_disabled_in_guild(self, guild):
+                return
+            if not (feed := self._feeds.get(guild_id, {}).get(member_id, {}).get(name)):
+                return
+
+            # Same rendering and channel resolution as polled feeds
+            guild_config = await self.config.guild(guild).all()
+            if not (channel := await self._get_feed_channel(guild.me, guild_config["channel"], feed["channel"])):
+                return
+            if e := await self._commit_embeds(
+                    entries=parsed.entries[::-1],
+                    feed=parsed,
+                    color=guild_config["color"],
+                    timestamp=guild_config["timestamp"],
+                    short=guild_config["short"]
+            ):
+                await channel.send(embed=e)
+
+            # Keep the time cursor current (in case the webhook is detached)
+            self._advance_cursor(guild_id, member_id, name, datetime.now(tz=timezone.utc).timestamp())
+            await self._flush_cursors()
+
+        except Exception:
+            log.exception(f"Error while sending GitHub webhook update in guild {guild_id}")
+
+    async def _github_rss(self, guild_to_check=None, urls: set = None):
+
+        to_check = []
 
         # Loop through each guild
         for guild_id, guild_config in (await self.config.all_guilds()).items():
@@ -640,23 +1072,39 @@ class GitHub(commands.Cog):
                 continue
 
             # Loop through each member
-            async for member_id, member_data in AsyncIter((await self.config.all_members(guild)).items(), steps=100):
+            async for member_id, member_feeds in AsyncIter(list(self._feeds.get(guild_id, {}).items()), steps=100):
 
                 # Loop through each feed
-                for name, feed in member_data["feeds"].items():
-                    url = await self._url_from_config(feed)
+                for name, feed in member_feeds.items():
 
-                    # Fetch & parse feed
-                    if not (parsed := await self._fetch(url, [200])):
+                    # Feeds with webhooks are updated by the receiver instead
+                    if self._webhook_runner and feed.get("webhook"):
                         continue
 
+                    # Check only feeds that are due (or not yet scheduled) when polling
+                    url = await self._url_from_config(feed)
+                    if urls is None or url in urls or url not in self._polls:
+                        to_check.append((guild, channel, guild_config, member_id, name, feed, url))
+
+        # Fetch & parse each distinct feed URL once, concurrently (skipped if unchanged), then handle subscribed feeds in order
+        # (a single-guild run does not see every subscriber, so it must not use or update the conditional request headers)
+        fetches = {}
+        for *__, url in to_check:
+            if url not in fetches:
+                fetches[url] = asyncio.create_task(self._fetch_limited(url, [200], conditional=not guild_to_check))
+        try:
+            for guild, channel, guild_config, member_id, name, feed, url in to_check:
+                if not (parsed := await fetches[url]):
+                    continue
+
+                try:
                     # Find new entries
-                    new_entries, new_time = await self.new_entries(parsed.entries, feed["time"])
+                    new_entries, new_time = await self.new_entries(parsed, feed["time"])
 
                     # Create feed embed
                     if e := await self._commit_embeds(
                             entries=new_entries,
-                            feed_link=parsed.feed.link,
+                            feed=parsed,
                             color=guild_config["color"],
                             timestamp=guild_config["timestamp"],
                             short=guild_config["short"]
@@ -672,10 +1120,74 @@ class GitHub(commands.Cog):
                         if ch:
                             await ch.send(embed=e)
 
-                        # Set time to feed config
-                        async with self.config.member_from_ids(guild_id, member_id).feeds() as member_feeds:
-                            member_feeds[name]["time"] = new_time.timestamp()
+                        # Set time to feed (written to config below)
+                        self._advance_cursor(guild.id, member_id, name, new_time.timestamp())
+
+                except Exception:
+                    # Keep going with the other subscribers, and fetch this URL in full next time so the entries are sent again (the cursor did not move)
+                    log.exception(f"Error while sending GitHub feed {name} in guild {guild.id}")
+                    self._validators.pop(url, None)
+        finally:
+            for fetch in fetches.values():
+                fetch.cancel()
+            await self._flush_cursors()  # Logs and keeps cursors it could not write, so the feeds below are still rescheduled
+
+        # Schedule the next fetch of each feed polled, and stop polling due feeds no one is subscribed to anymore
+        if not guild_to_check:
+            for url, fetch in fetches.items():
+                self._reschedule(url, fetch.result())
+            for url in (urls or set()).difference(fetches):
+                self._polls.pop(url, None)
+
+    def _reschedule(self, url: str, parsed):
+        poll = self._polls.setdefault(url, {"interval": self._base_interval, "due": 0, "newest": None})
+
+        if parsed and parsed.entries and parsed.newest != poll["newest"]:
+            # Feed changed (or is new): fetch it again at the base interval
+            poll["interval"], poll["newest"] = self._base_interval, parsed.newest
+        else:
+            # Feed unchanged (or could not be fetched): back off exponentially
+            poll["interval"] = min(poll["interval"] * 2, self._max_poll_interval)
+
+        self._schedule_poll(url, time.time() + poll["interval"] * random.uniform(0.9, 1.1))
+
+    def _schedule_poll(self, url: str, due: float):
+        self._polls.setdefault(url, {"interval": self._base_interval, "due": 0, "newest": None})["due"] = due
+        heapq.heappush(self._poll_queue, (due, url))
+        if self._poll_queue[0][1] == url:
+            self._poll_event.set()
 
-    @_github_rss.before_loop
-    async def _before_github_rss(self):
+    async def _poll_scheduler(self):
         await self.bot.wait_until_red_ready()
+
+        # Fetch every feed once to schedule them
+        try:
+            await self._github_rss()
+        except Exception:
+            log.exception("Error while fetching GitHub feeds")
+
+        while True:
+            self._poll_event.clear()
+
+            # Sleep until the next feed is due or one is scheduled sooner
+            try:
+                await asyncio.wait_for(self._poll_event.wait(), timeout=max(self._poll_queue[0][0] - time.time(), 0) if self._poll_queue else None)
+            except asyncio.TimeoutError:
+                pass
+
+            # Fetch all feeds due soon together
+            due, horizon = set(), time.time() + POLL_BATCH_SECONDS
+            while self._poll_queue and self._poll_queue[0][0] <= horizon:
+                when, url = heapq.heappop(self._poll_queue)
+                if (poll := self._polls.get(url)) and poll["due"] == when:  # Not rescheduled since
+                    due.add(url)
+            if not due:
+                continue
+
+            try:
+                await self._github_rss(urls=due)
+            except Exception:
+                log.exception("Error while fetching GitHub feeds")
+                for url in due:
+                    if (poll := self._polls.get(url)) and poll["due"] <= horizon:
+                        self._schedule_poll(url, time.time() + poll["interval"])
@@ -1,4 +1,9 @@
+import time
+import zlib
+import base64
 from copy import copy
+from array import array
+from bisect import bisect_left
 
 
 class ConfigCache:
@@ -52,37 +57,197 @@ class GuildCache(ConfigCache):
 
 
 class MemberCache(ConfigCache):
+    # Compact storage: per guild, a sorted array of member IDs plus one parallel array per (integer) default key
     def __init__(self):
         super().__init__()
+        self.dirty: dict = {}
+
+        # Rolling windows: per guild, the windowed key, the days kept and one parallel array of counts per day (saved as one blob per guild)
+        self.windows: dict = {}
+        self.windows_dirty: set = set()
 
     def initialize(self, config: dict, defaults: dict):
-        super().initialize(config, defaults)
+        super().initialize({}, defaults)
+        self.dirty: dict = {}
+        for guild_id, guild_members in config.items():
+            member_ids = sorted(guild_members)
+            self.cache[guild_id] = {"ids": array("Q", member_ids)}
+            for key, default in defaults.items():
+                self.cache[guild_id][key] = array("Q", (guild_members[m].get(key, default) for m in member_ids))
+
+    def _index(self, guild_id: int, member_id: int, create: bool = False):
+        if not (cache := self.cache.get(guild_id)):
+            if not create:
+                return None, None
+            cache = self.cache[guild_id] = {"ids": array("Q"), **{key: array("Q") for key in self.defaults}}
+
+        i = bisect_left(cache["ids"], member_id)
+        if i < len(cache["ids"]) and cache["ids"][i] == member_id:
+            return cache, i
+        if not create:
+            return cache, None
+
+        # Insert the new member in sorted position
+        cache["ids"].insert(i, member_id)
+        for key, default in self.defaults.items():
+            cache[key].insert(i, default)
+        if window := self.windows.get(guild_id):
+            for bucket in window["buckets"].values():
+                bucket.insert(i, 0)
+        return cache, i
 
     def get(self, guild_id: int, member_id: int = None, key: str = None):
-        cache = self.cache.get(guild_id, {}).get(member_id)
-        if member_id and key:
-            return cache[key] if cache else self.defaults[key]
-        elif member_id:
-            return cache or self.defaults
-        return self.cache.get(guild_id, {})
+        if member_id:
+            cache, i = self._index(guild_id, member_id)
+            if key:
+                return cache[key][i] if i is not None else self.defaults[key]
+            return {k: cache[k][i] for k in self.defaults} if i is not None else self.defaults
+        cache = self.cache.get(guild_id)
+        if not cache:
+            return {}
+        return {m: {k: cache[k][i] for k in self.defaults} for i, m in enumerate(cache["ids"])}
 
     def set(self, guild_id: int, member_id: int, key: str, value):
-        if not self.cache.get(guild_id):
-            self.cache[guild_id] = {}
-        if self.cache[guild_id].get(member_id):
-            self.cache[guild_id][member_id][key] = value
-        else:
-            self.cache[guild_id][member_id] = copy(self.defaults)
-            self.cache[guild_id][member_id].update({key: value})
-        return self.cache[guild_id][member_id]
+        cache, i = self._index(guild_id, member_id, create=True)
+        cache[key][i] = value
+        self.dirty.setdefault(guild_id, set()).add(member_id)
+        return {k: cache[k][i] for k in self.defaults}
 
     def increment(self, guild_id: int, member_id: int, key: str, value):
-        if not self.cache.get(guild_id):
-            self.cache[guild_id] = {}
-        if not self.cache[guild_id].get(member_id):
-            self.cache[guild_id][member_id] = copy(self.defaults)
-        self.cache[guild_id][member_id][key] += value
-        return self.cache[guild_id][member_id]
+        cache, i = self._index(guild_id, member_id, create=True)
+        cache[key][i] += value
+        self.dirty.setdefault(guild_id, set()).add(member_id)
+        if (window := self.windows.get(guild_id)) and window["key"] == key:
+            bucket = self._bucket(window, len(cache["ids"]))
+            bucket[i] = min(bucket[i] + value, 0xFFFF)
+            self.windows_dirty.add(guild_id)
+        return {k: cache[k][i] for k in self.defaults}
+
+    def set_window(self, guild_id: int, key: str, days: int):
+        # Keep `days` days of per-day counts for the key (0 to stop tracking)
+        if not days:
+            if self.windows.pop(guild_id, None):
+                self.windows_dirty.add(guild_id)
+        elif (window := self.windows.get(guild_id)) and window["key"] == key:
+            if window["days"] != days:
+                window["days"] = days
+                self._expire(window, self._today())
+                self.windows_dirty.add(guild_id)
+        else:
+            self.windows[guild_id] = {"key": key, "days": days, "buckets": {}}
+            self.windows_dirty.add(guild_id)
+
+    def window_days(self, guild_id: int) -> int:
+        return window["days"] if (window := self.windows.get(guild_id)) else 0
+
+    def window_count(self, guild_id: int, member_id: int, days: int) -> int:
+        if not (window := self.windows.get(guild_id)):
+            return 0
+        cache, i = self._index(guild_id, member_id)
+        if i is None:
+            return 0
+        today = self._today()
+        self._expire(window, today)
+        buckets = window["buckets"]
+        return sum(buckets[day][i] for day in range(today - min(days, window["days"]) + 1, today + 1) if day in buckets)
+
+    def clear_window(self, guild_id: int, member_id: int):
+        if window := self.windows.get(guild_id):
+            cache, i = self._index(guild_id, member_id)
+            if i is not None:
+                for bucket in window["buckets"].values():
+                    bucket[i] = 0
+                self.windows_dirty.add(guild_id)
+
+    def dump_window(self, guild_id: int):
+        # Compact, JSON-safe snapshot of a guild's window (None if it has none): the member IDs and each day's counts in the same order
+        if not (window := self.windows.get(guild_id)):
+            return None
+        self._expire(window, self._today())
+        return {
+            "key": window["key"],
+            "days": window["days"],
+            "ids": self._pack(self.cache[guild_id]["ids"] if guild_id in self.cache else array("Q")),
+            "buckets": {str(day): self._pack(bucket) for day, bucket in window["buckets"].items()}
+        }
+
+    def load_window(self, guild_id: int, saved: dict):
+        # Restore a snapshot from dump_window, realigned to the cached member IDs (members no longer cached are dropped)
+        if not saved.get("key"):
+            return
+        window = self.windows[guild_id] = {"key": saved["key"], "days": saved["days"], "buckets": {}}
+        saved_ids = self._unpack("Q", saved["ids"])
+        ids = self.cache[guild_id]["ids"] if guild_id in self.cache else array("Q")
+
+        moved = None
+        if saved_ids != ids:
+            moved = []
+            for j, member_id in enumerate(saved_ids):
+                i = bisect_left(ids, member_id)
+                if i < len(ids) and ids[i] == member_id:
+                    moved.append((i, j))
+
+        for day, packed in saved["buckets"].items():
+            saved_bucket = self._unpack("H", packed)
+            if moved is None:
+                window["buckets"][int(day)] = saved_bucket
+            else:
+                bucket = window["buckets"][int(day)] = array("H", bytes(2 * len(ids)))
+                for i, j in moved:
+                    bucket[i] = saved_bucket[j]
+        self._expire(window, self._today())
+
+    def pop_windows_dirty(self) -> set:
+        dirty, self.windows_dirty = self.windows_dirty, set()
+        return dirty
+
+    @staticmethod
+    def _pack(values: array) -> str:
+        return base64.b64encode(zlib.compress(values.tobytes())).decode()
+
+    @staticmethod
+    def _unpack(typecode: str, packed: str) -> array:
+        values = array(typecode)
+        values.frombytes(zlib.decompress(base64.b64decode(packed)))
+        return values
+
+    @staticmethod
+    def _today() -> int:
+        return int(time.time() // 86400)
+
+    def _bucket(self, window: dict, members: int) -> array:
+        today = self._today()
+        if (bucket := window["buckets"].get(today)) is None:
+            self._expire(window, today)
+            bucket = window["buckets"][today] = array("H", bytes(2 * members))
+        return bucket
+
+    @staticmethod
+    def _expire(window: dict, today: int):
+        for day in [d for d in window["buckets"] if d <= today - window["days"]]:
+            del window["buckets"][day]
+
+    def clear(self, guild_id: int):
+        self.cache.pop(guild_id, None)
+        self.dirty.pop(guild_id, None)
+        if window := self.windows.get(guild_id):
+            window["buckets"].clear()
+            self.windows_dirty.add(guild_id)
+
+    def pop_dirty(self, guild_id: int):
+        return self.dirty.pop(guild_id, set())
+
+    def mark_dirty(self, guild_id: int, member_ids: set):
+        self.dirty.setdefault(guild_id, set()).update(member_ids)
+
+    def size(self):
+        return sum(len(cache["ids"]) for cache in self.cache.values())
+
+    def window_bytes(self):
+        return sum(bucket.itemsize * len(bucket) for window in self.windows.values() for bucket in window["buckets"].values())
+
+    def dirty_count(self):
+        return sum(len(members) for members in self.dirty.values())
 
     def items(self):
-        return super().items()
+        return [(guild_id, self.get(guild_id)) for guild_id in self.cache]
@@ -22,10 +22,16 @@ OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 SOFTWARE.
 """
 
+import time
+import heapq
+import random
+import asyncio
+import logging
 from datetime import datetime, timedelta
 
 import discord
 from discord.ext import tasks
+from .tiertable import TierTable
 from .configcache import GuildCache, MemberCache
 from redbot.core import commands, Config
 from redbot.core.utils import AsyncIter
@@ -33,6 +39,20 @@ from redbot.core.utils.chat_formatting import humanize_list, humanize_timedelta
 
 
 DEFAULT_INTERVAL = 15
+DEFAULT_CONCURRENCY = 4
+
+# Full checks (a fallback, as members are checked as soon as they qualify): guilds up to this size are checked every interval, larger ones up to 4x less often
+CADENCE_MEMBERS = 10000
+MAX_CADENCE_MULTIPLIER = 4
+
+# Longest message window a tier can count over (per-day counts are kept for each member in guilds using windows)
+MAX_WINDOW_DAYS = 30
+
+# Role updates per guild: concurrent requests, and attempts before giving up on a member
+ROLE_EDIT_CONCURRENCY = 2
+ROLE_EDIT_ATTEMPTS = 5
+
+log = logging.getLogger("red.ob13-cogs.roletiers")
 
 
 class RoleTiers(commands.Cog):
@@ -48,7 +68,8 @@ class RoleTiers(commands.Cog):
         self.config = Config.get_conf(self, identifier=14000605, force_registration=True)
 
         default_global = {
-            "interval": DEFAULT_INTERVAL
+            "interval": DEFAULT_INTERVAL,
+            "concurrency": DEFAULT_CONCURRENCY
         }
         self.default_guild = {
             "toggle": False,
@@ -64,26 +85,65 @@ class RoleTiers(commands.Cog):
         self.config.register_guild(**self.default_guild)
         self.config.register_member(**self.default_member)
 
+        # Per-day message counts for tier windows, saved per guild by MemberCache.dump_window
+        self.config.init_custom("MessageWindows", 1)
+        self.config.register_custom("MessageWindows", key=None, days=0, ids="", buckets={})
+
         self.guild_settings: GuildCache = GuildCache()
         self.member_data: MemberCache = MemberCache()
 
+        # Member flush metrics (see [p]roletiersstats)
+        self._flush_latency: float = 0.0
+        self._flush_written: int = 0
+
+        # Tier configs per guild, and pending member checks ({(guild_id, member_id): due} and a heap of due times)
+        self.interval: int = DEFAULT_INTERVAL
+        self._tiers: dict = {}
+        self._check_due: dict = {}
+        self._check_queue: list = []
+        self._check_event: asyncio.Event = asyncio.Event()
+        self._check_task = None
+
+        # Pending role updates per guild ({member_id: (roles to add, roles to remove)}), their workers and stats
+        self._role_edits: dict = {}
+        self._role_workers: dict = {}
+        self._role_edit_stats: dict = {}
+        self._scan_progress: dict = {}
+
+        # Full guild checks: running tasks, when each guild is next due, its cadence and messages since its last check
+        self._guild_checks: dict = {}
+        self._next_guild_check: dict = {}
+        self._cadence: dict = {}
+        self._guild_activity: dict = {}
+        self._check_semaphore: asyncio.Semaphore = asyncio.Semaphore(DEFAULT_CONCURRENCY)
+
     async def initialize(self):
 
         # Cache config
         self.guild_settings.initialize(await self.config.all_guilds(), self.default_guild)
         self.member_data.initialize(await self.config.all_members(), self.default_member)
+        for guild_id, saved_window in (await self.config.custom("MessageWindows").all()).items():
+            self.member_data.load_window(int(guild_id), saved_window)
+
+        global_conf = await self.config.all()
+        self.interval = global_conf["interval"]
+        self._check_semaphore = asyncio.Semaphore(global_conf["concurrency"])
 
         # Start loops
         self._config_cache.start()
         self._tier_checker.start()
-
-        # Change loop interval if necessary
-        if (interval := await self.config.interval()) != DEFAULT_INTERVAL:
-            self._tier_checker.change_interval(minutes=interval)
+        self._check_task = asyncio.create_task(self._check_scheduler())
 
     def cog_unload(self):
         self._config_cache.cancel()
         self._tier_checker.cancel()
+        if self._check_task:
+            self._check_task.cancel()
+        for task in self._guild_checks.values():
+            task.cancel()
+        for workers in self._role_workers.values():
+            for worker in workers:
+                worker.cancel()
 
     @staticmethod
     async def _seconds_since(time: datetime):
@@ -102,13 +162,39 @@ class RoleTiers(commands.Cog):
         ):
             return
 
-        self.member_data.increment(message.guild.id, message.author.id, "messages", 1)
+        tiers = await self._load_tiers(message.guild.id)  # Also sets up message windows before counting
+        messages = self.member_data.increment(message.guild.id, message.author.id, "messages", 1)["messages"]
+        self._guild_activity[message.guild.id] = self._guild_activity.get(message.guild.id, 0) + 1
+
+        # Check the member right away if they just reached a tier's message requirement
+        windowed = {}
+        for tier in tiers:
+            if window := tier.get("window"):
+                if window not in windowed:
+                    windowed[window] = self.member_data.window_count(message.guild.id, message.author.id, window)
+                count = windowed[window]
+            else:
+                count = messages
+            if tier["messages"] == count:
+                self._schedule_check(message.guild.id, message.author.id, time.time())
+                break
 
     @commands.Cog.listener("on_command")
     async def _command_listener(self, message: discord.Message):
         if message.guild and self.guild_settings.get(message.guild.id, "count_commands"):
             await self._message_listener(message)
 
+    @commands.Cog.listener("on_member_join")
+    async def _member_join_listener(self, member: discord.Member):
+
+        # Check new members right away (e.g. for tiers with no requirements)
+        if (
+                not member.bot and  # Member is not a bot
+                self.guild_settings.get(member.guild.id, "toggle") and  # RoleTiers toggled on
+                await self._load_tiers(member.guild.id)  # Guild has tiers
+        ):
+            self._schedule_check(member.guild.id, member.id, time.time())
+
     @commands.Cog.listener("on_member_remove")
     async def _member_leave_listener(self, member: discord.Member):
 
@@ -122,6 +208,7 @@ class RoleTiers(commands.Cog):
             return
 
         self.member_data.set(member.guild.id, member.id, "messages", 0)
+        self.member_data.clear_window(member.guild.id, member.id)
 
     @commands.guild_only()
     @commands.bot_has_permissions(manage_roles=True)
@@ -140,11 +227,40 @@ class RoleTiers(commands.Cog):
         """
         Set the global tier-checking interval for RoleTiers.
 
-        Depending on the size of your bot, you may want to modify the interval for which the bot checks tiers for members in all guilds (default is 15 minutes).
+        Depending on the size of your bot, you may want to modify the interval for which the bot checks tiers for members in all guilds (default is 15 minutes). Members are also checked as soon as they reach a tier's requirements, so this full check only catches anything that was missed. Servers are checked at most this often: very large or quiet servers are checked less often.
         """
         await self.config.interval.set(interval_in_minutes)
-        self._tier_checker.change_interval(minutes=interval_in_minutes)
-        return await ctx.send(f"I will now check tiers for all members every {interval_in_minutes} minutes (change takes effect next loop).")
+        self.interval = interval_in_minutes
+        return await ctx.send(f"I will now check tiers for all members about every {interval_in_minutes} minutes (change takes effect after each server's next check).")
+
+    @commands.is_owner()
+    @commands.command(name="roletiersconcurrency", hidden=True)
+    async def _concurrency(self, ctx: commands.Context, servers: int):
+        """
+        Set how many servers RoleTiers can check tiers for at once.
+
+        Each server's full tier check runs on its own, so one large server does not hold up the others (default is 4).
+        """
+        if servers < 1:
+            return await ctx.send("Please enter a positive integer!")
+        await self.config.concurrency.set(servers)
+        self._check_semaphore = asyncio.Semaphore(servers)
+        return await ctx.send(f"I will now check tiers in up to {servers} servers at once.")
+
+    @commands.is_owner()
+    @commands.command(name="roletiersstats", hidden=True)
+    async def _stats(self, ctx: commands.Context):
+        """View RoleTiers cache flush metrics."""
+        stats = [
+            f"**Cached Members:** {self.member_data.size()}",
+            f"**Dirty Members:** {self.member_data.dirty_count()}",
+            f"**Message Window Memory:** {round(self.member_data.window_bytes() / 1024, 1)}KiB",
+            f"**Members Written Last Flush:** {self._flush_written}",
+            f"**Last Flush Latency:** {round(self._flush_latency * 1000, 1)}ms",
+            f"**Pending Role Updates:** {sum(len(edits) for edits in self._role_edits.values())}",
+            f"**Running Server Checks:** {len(self._guild_checks)}"
+        ]
+        return await ctx.maybe_send_embed("\n".join(stats))
 
     @_role_tiers.command(name="toggle")
     async def _toggle(self, ctx: commands.Context, true_or_false: bool):
@@ -179,7 +295,7 @@ class RoleTiers(commands.Cog):
         return await ctx.tick()
 
     @_role_tiers.command(name="addtier", aliases=["add"])
-    async def _add_tier(self, ctx: commands.Context, tier: int, role: discord.Role, messages: int, hours: int, remove: bool):
+    async def _add_tier(self, ctx: commands.Context, tier: int, role: discord.Role, messages: int, hours: int, remove: bool, window_days: int = None):
         """
         Add a tier to the server RoleTiers (parameters below).
 
@@ -188,6 +304,9 @@ class RoleTiers(commands.Cog):
         `messages`: the # of required messages users must have sent
         `hours`: the time (in hours) users must have been in the server for
         `remove`: whether to remove the roles assigned by previous tiers
+        `window_days`: (optional) only count messages sent in the last this many days (max 30)
+
+        Messages for windowed tiers are only counted once the server has such a tier.
         """
 
         if messages < 0:
@@ -196,6 +315,9 @@ class RoleTiers(commands.Cog):
         if hours < 0:
             return await ctx.send("Please enter a non-negative integer for `hours`!")
 
+        if window_days is not None and not 0 < window_days <= MAX_WINDOW_DAYS:
+            return await ctx.send(f"Please enter an integer between 1 and {MAX_WINDOW_DAYS} for `window_days`!")
+
         # Role hierarchy check
         if role >= ctx.author.top_role and ctx.author != ctx.guild.owner:
             return await ctx.send("The role you provided is above you in the role hierarchy!")
@@ -205,7 +327,7 @@ class RoleTiers(commands.Cog):
         async with self.config.guild(ctx.guild).tiers() as guild_tiers:
 
             for guild_tier in guild_tiers:
-                if guild_tier["role"] == role.id and guild_tier["messages"] == messages and guild_tier["hours"] == hours:
+                if guild_tier["role"] == role.id and guild_tier["messages"] == messages and guild_tier["hours"] == hours and guild_tier.get("window") == window_days:
                     return await ctx.send("There is already an identical tier!")
 
             guild_tiers.insert(
@@ -214,9 +336,11 @@ class RoleTiers(commands.Cog):
                     "role": role.id,
                     "messages": messages,
                     "hours": hours,
-                    "remove": remove
+                    "remove": remove,
+                    "window": window_days
                 }
             )
+        self._tiers.pop(ctx.guild.id, None)
 
         return await ctx.send("Tier successfully added.")
 
@@ -232,6 +356,7 @@ class RoleTiers(commands.Cog):
                 guild_tiers.insert(new_position-1, guild_tiers.pop(tier-1))
             except IndexError:
                 return await ctx.send(f"Tier {tier} was not found.")
+        self._tiers.pop(ctx.guild.id, None)
         return await ctx.tick()
 
     @_edit_tier.command(name="role")
@@ -242,6 +367,7 @@ class RoleTiers(commands.Cog):
                 guild_tiers[tier-1]["role"] = role.id
             except IndexError:
                 return await ctx.send(f"Tier {tier} was not found.")
+        self._tiers.pop(ctx.guild.id, None)
         return await ctx.tick()
 
     @_edit_tier.command(name="messages")
@@ -255,6 +381,21 @@ class RoleTiers(commands.Cog):
                 guild_tiers[tier - 1]["messages"] = messages
             except IndexError:
                 return await ctx.send(f"Tier {tier} was not found.")
+        self._tiers.pop(ctx.guild.id, None)
+        return await ctx.tick()
+
+    @_edit_tier.command(name="window")
+    async def _edit_window(self, ctx: commands.Context, tier: int, window_days: int = None):
+        """Edit the window (in days) a RoleTier counts messages over (leave blank to count all messages)."""
+        if window_days is not None and not 0 < window_days <= MAX_WINDOW_DAYS:
+            return await ctx.send(f"Please enter an integer between 1 and {MAX_WINDOW_DAYS} for `window_days`!")
+
+        async with self.config.guild(ctx.guild).tiers() as guild_tiers:
+            try:
+                guild_tiers[tier - 1]["window"] = window_days
+            except IndexError:
+                return await ctx.send(f"Tier {tier} was not found.")
+        self._tiers.pop(ctx.guild.id, None)
         return await ctx.tick()
 
     @_edit_tier.command(name="hours")
@@ -268,6 +409,7 @@ class RoleTiers(commands.Cog):
                 guild_tiers[tier - 1]["hours"] = hours
             except IndexError:
                 return await ctx.send(f"Tier {tier} was not found.")
+        self._tiers.pop(ctx.guild.id, None)
         return await ctx.tick()
 
     @_edit_tier.command(name="remove")
@@ -278,6 +420,7 @@ class RoleTiers(commands.Cog):
                 guild_tiers[tier - 1]["remove"] = remove
             except IndexError:
                 return await ctx.send(f"Tier {tier} was not found.")
+        self._tiers.pop(ctx.guild.id, None)
         return await ctx.tick()
 
     @_role_tiers.command(name="removetier", aliases=["remove", "delete"])
@@ -292,6 +435,7 @@ class RoleTiers(commands.Cog):
             if not 0 <= tier-1 < len(guild_tiers):
                 return await ctx.send(f"Tier {tier} does not exist!")
             guild_tiers.pop(tier-1)
+        self._tiers.pop(ctx.guild.id, None)
 
         return await ctx.send("Tier removed successfully.")
 
@@ -299,25 +443,53 @@ class RoleTiers(commands.Cog):
     async def _user(self, ctx: commands.Context, user: discord.Member):
         """View a user's RoleTiers stats."""
         messages = self.member_data.get(ctx.guild.id, user.id, "messages")
+        windows = sorted({window for tier in await self._load_tiers(ctx.guild.id) if (window := tier.get("window"))})
+        windowed = "".join(f"**Messages (Last {w} Days):** {self.member_data.window_count(ctx.guild.id, user.id, w)}\n" for w in windows)
         seconds = int(await self._seconds_since(user.joined_at))
-        return await ctx.maybe_send_embed(f"**Messages Sent:** {messages}\n**Time Since Join:** {humanize_timedelta(timedelta=(timedelta(seconds=(seconds - seconds%3600)))) or '< 1 hour'}")
+        return await ctx.maybe_send_embed(f"**Messages Sent:** {messages}\n{windowed}**Time Since Join:** {humanize_timedelta(timedelta=(timedelta(seconds=(seconds - seconds%3600)))) or '< 1 hour'}")
 
     @_role_tiers.command(name="forcecheck", hidden=True)
     async def _force_check(self, ctx: commands.Context, enter_true_to_confirm: bool):
         """Force a run of the tier-checking loop."""
         if not enter_true_to_confirm:
             return await ctx.send("Please enter `true` to confirm this action!")
-        async with ctx.typing():
-            await self._tier_checker.coro(self, guild_to_check=ctx.guild.id)
+
+        progress = await ctx.send("Checking tiers...")
+        stats_before = dict(self._role_edit_stats.get(ctx.guild.id, {}))
+        scan = self._start_guild_check(ctx.guild.id)
+
+        # Report progress until the scan is done and all role updates have been made (or no workers are left to make them)
+        while True:
+            if not scan.done():
+                await asyncio.wait({scan}, timeout=5)
+            elif self._role_edits.get(ctx.guild.id) and self._role_workers.get(ctx.guild.id):
+                await asyncio.sleep(5)
+            else:
+                break
+            await progress.edit(content=self._force_check_progress(ctx.guild.id, stats_before, scan.done()))
+
+        await scan
+        await progress.edit(content=self._force_check_progress(ctx.guild.id, stats_before, True))
         return await ctx.tick()
 
+    def _force_check_progress(self, guild_id: int, stats_before: dict, scanned: bool):
+        stats = self._role_edit_stats.get(guild_id, {})
+        done, total = self._scan_progress.get(guild_id, (0, 0))
+        return (
+            f"{'Checked' if scanned else 'Checking'} tiers for {done}/{total} members. "
+            f"Role updates: {len(self._role_edits.get(guild_id, {}))} pending, "
+            f"{stats.get('done', 0) - stats_before.get('done', 0)} made, "
+            f"{stats.get('failed', 0) - stats_before.get('failed', 0)} failed."
+        )
+
     @_role_tiers.command(name="resetusers", hidden=True)
     async def _reset_users(self, ctx: commands.Context, enter_true_to_confirm: bool):
         """Reset all users' message counts for this server (warning: this cannot be undone)."""
         if not enter_true_to_confirm:
             return await ctx.send("Please enter `true` to confirm this action!")
-        await self.config.clear_all_members(guild=ctx.guild)
-        self.member_data.cache[ctx.guild.id] = {}
+        async with self._members_group(ctx.guild.id).get_lock():  # So a flush in progress cannot write back the old counts
+            await self.config.clear_all_members(guild=ctx.guild)
+            self.member_data.clear(ctx.guild.id)
         return await ctx.tick()
 
     @commands.bot_has_permissions(embed_links=True)
@@ -344,7 +516,7 @@ class RoleTiers(commands.Cog):
 
             tier_info = [
                 f"**Role to Assign:** {role.mention}",
-                f"**Messages Sent:** {guild_tiers[i]['messages']}",
+                f"**Messages Sent:** {guild_tiers[i]['messages']}" + (f" (last {window} days)" if (window := guild_tiers[i].get("window")) else ""),
                 f"**Hours In Server:** {guild_tiers[i]['hours']}",
                 f"**Remove Prev. Roles:** {guild_tiers[i]['remove']}"
             ]
@@ -361,6 +533,7 @@ class RoleTiers(commands.Cog):
                 if t not in invalid_tiers:
                     new_tiers.append(guild_tiers[t])
             await self.config.guild(ctx.guild).tiers.set(new_tiers)
+            self._tiers.pop(ctx.guild.id, None)
 
         return await ctx.send(embed=embed)
 
@@ -374,11 +547,32 @@ class RoleTiers(commands.Cog):
                 guild_config["count_commands"] = guild_settings["count_commands"]
                 guild_config["ignore"] = guild_settings["ignore"]
 
-        # Cache member settings
-        for guild_id, guild_members in self.member_data.items():
-            async for member_id, member_settings in AsyncIter(guild_members.items(), steps=500):
-                async with self.config.member_from_ids(guild_id, member_id).all() as member_config:
-                    member_config["messages"] = member_settings["messages"]
+        # Cache member settings (only changed members, one write per guild)
+        start, written = time.perf_counter(), 0
+        for guild_id in list(self.member_data.dirty):
+            if not (member_ids := self.member_data.pop_dirty(guild_id)):
+                continue
+            try:
+                async with self._members_group(guild_id).all() as guild_members:
+                    for member_id in member_ids:
+                        guild_members.setdefault(str(member_id), {})["messages"] = self.member_data.get(guild_id, member_id, "messages")
+            except Exception:
+                log.exception(f"Error while saving RoleTiers member counts for guild {guild_id}")
+                self.member_data.mark_dirty(guild_id, member_ids)  # Keep for the next flush
+                continue
+            written += len(member_ids)
+        self._flush_latency, self._flush_written = time.perf_counter() - start, written
+
+        # Cache message windows (one blob per changed guild)
+        for guild_id in self.member_data.pop_windows_dirty():
+            try:
+                if (saved_window := self.member_data.dump_window(guild_id)) is None:
+                    await self.config.custom("MessageWindows", str(guild_id)).clear()
+                else:
+                    await self.config.custom("MessageWindows", str(guild_id)).set(saved_window)
+            except Exception:
+                log.exception(f"Error while saving RoleTiers message windows for guild {guild_id}")
+                self.member_data.windows_dirty.add(guild_id)  # Keep for the next flush
 
     @_config_cache.before_loop
     async def _before_config_cache(self):
@@ -389,70 +583,202 @@ class RoleTiers(commands.Cog):
         if self._config_cache.is_being_cancelled():
             await self._config_cache.coro(self)
 
-    @tasks.loop(minutes=DEFAULT_INTERVAL)
-    async def _tier_checker(self, guild_to_check=None):
+    @tasks.loop(minutes=1)
+    async def _tier_checker(self):
 
-        # Loop through each guild
+        # Start full checks for guilds that are due (reconciliation; members are otherwise checked as soon as they qualify)
+        now = time.time()
         for guild_id, guild_settings in self.guild_settings.items():
+            if guild_settings["toggle"] and guild_id not in self._guild_checks and self._next_guild_check.get(guild_id, 0) <= now:
+                self._start_guild_check(guild_id)
 
-            # Check for single guild
-            if guild_to_check and guild_id != guild_to_check:
-                continue
+    @_tier_checker.before_loop
+    async def _before_checker(self):
+        await self.bot.wait_until_red_ready()
 
-            # Checks for guild
-            if (
-                    not (guild := self.bot.get_guild(guild_id)) or  # No longer in guild
-                    await self.bot.cog_disabled_in_guild(self, guild) or  # Cog disabled in guild
-                    not self.guild_settings.get(guild_id, "toggle") or  # RoleTiers toggled off
-                    not guild.me.guild_permissions.manage_roles  # Cannot manage roles
-            ):
-                continue
+    def _start_guild_check(self, guild_id: int) -> asyncio.Task:
+        if not (task := self._guild_checks.get(guild_id)):
+            task = self._guild_checks[guild_id] = asyncio.create_task(self._check_guild(guild_id))
+        return task
+
+    async def _check_guild(self, guild_id: int):
+        try:
+            async with self._check_semaphore:
+
+                # Checks for guild
+                if not await self._can_check(guild := self.bot.get_guild(guild_id)):
+                    return
+
+                if not (tier_table := await self._guild_tiers(guild)):
+                    return
+
+                # Loop through each member
+                self._scan_progress[guild_id] = progress = [0, len(guild.members)]
+                async for member in AsyncIter(guild.members, steps=100):
+                    await self._check_member(guild, member, tier_table)
+                    progress[0] += 1
+
+        except Exception:
+            log.exception(f"Error while checking tiers in guild {guild_id}")
+
+        finally:
+            del self._guild_checks[guild_id]
+            self._cadence[guild_id] = cadence = self._guild_cadence(guild_id)
+            self._next_guild_check[guild_id] = time.time() + cadence
+            self._guild_activity[guild_id] = 0
+
+    def _guild_cadence(self, guild_id: int) -> float:
+        if not (guild := self.bot.get_guild(guild_id)):
+            return self.interval * 60
+
+        # Never check more often than the interval: stretch it for large guilds, and check quiet guilds half as often
+        cadence = self.interval * 60 * min(max((guild.member_count or len(guild.members)) / CADENCE_MEMBERS, 1), MAX_CADENCE_MULTIPLIER)
+        if not self._guild_activity.get(guild_id):
+            cadence *= 2
+        return cadence
+
+    async def _can_check(self, guild: discord.Guild) -> bool:
+        return not (
+                not guild or  # No longer in guild
+                await self.bot.cog_disabled_in_guild(self, guild) or  # Cog disabled in guild
+                not self.guild_settings.get(guild.id, "toggle") or  # RoleTiers toggled off
+                not guild.me.guild_permissions.manage_roles  # Cannot manage roles
+        )
 
-            # Validate tiers & fetch roles
-            guild_tiers_config: list = await self.config.guild(guild).tiers()
-            guild_tiers: list = []
-            for i in range(len(guild_tiers_config)):
-                if role := guild.get_role(guild_tiers_config[i]["role"]):
-                    guild_tiers.append(guild_tiers_config[i])
-                    guild_tiers[i].update(role=role)
+    def _members_group(self, guild_id: int):
+        # All of a guild's member data, written in one go by _config_cache
+        return self.config._get_base_group(Config.MEMBER, str(guild_id))
 
-            # Loop through each member
-            async for member in AsyncIter(guild.members, steps=100):
+    async def _load_tiers(self, guild_id: int) -> list:
+        if (tiers := self._tiers.get(guild_id)) is None:
+            tiers = self._tiers[guild_id] = await self.config.guild_from_id(guild_id).tiers()
 
-                # Check ignore list
-                if member.id in guild_settings["ignore"]:
-                    continue
+            # Only keep per-day message counts for as long as the guild's longest window
+            self.member_data.set_window(guild_id, "messages", max((tier.get("window") or 0 for tier in tiers), default=0))
+        return tiers
 
-                member_settings = self.member_data.get(guild_id, member.id)
+    async def _guild_tiers(self, guild: discord.Guild) -> TierTable:
+        # Validate tiers & fetch roles
+        return TierTable([{**tier, "role": role} for tier in await self._load_tiers(guild.id) if (role := guild.get_role(tier["role"]))])
 
-                member_roles = [r.id for r in member.roles]
-                member_tier_roles, new_tier = [], None
+    async def _check_member(self, guild: discord.Guild, member: discord.Member, tier_table: TierTable):
 
-                # Check each tier
-                for tier in reversed(guild_tiers):
+        # Check ignore list
+        if member.id in self.guild_settings.get(guild.id, "ignore") or not member.joined_at:
+            return
 
-                    # Member currently in tier
-                    if tier["role"].id in member_roles:
-                        if tier["role"] not in member_tier_roles:
-                            member_tier_roles.append(tier["role"])
+        member_messages = {
+            window: self.member_data.window_count(guild.id, member.id, window) if window else self.member_data.get(guild.id, member.id, "messages")
+            for window in tier_table.window_set
+        }
+        member_seconds = await self._seconds_since(member.joined_at)
 
-                    # Check if member qualifies for tier
-                    elif (
-                            not new_tier and  # Does not already have a newly qualified higher tier
-                            not member_tier_roles and  # Member is not already in a higher tier
-                            ((await self._seconds_since(member.joined_at)) / 3600 >= tier["hours"]) and  # Time since join qualified
-                            (member_settings["messages"] >= tier["messages"])  # Message requirement satisfied
-                    ):
-                        new_tier = tier
+        # Find the member's current tier roles and the highest new tier they qualify for
+        member_tier_roles, new_tier, next_hours = tier_table.evaluate((r.id for r in member.roles), member_messages, member_seconds / 3600)
 
-                # Add role from new tier
-                if new_tier and new_tier["role"] and new_tier["role"] < guild.me.top_role:
-                    await member.add_roles(new_tier["role"], reason="RoleTiers: member reached new tier")
+        # Check again once the member has been in the server long enough (if before the next full run)
+        if next_hours is not None and (delay := next_hours * 3600 - member_seconds) <= self._cadence.get(guild.id, self.interval * 60):
+            self._schedule_check(guild.id, member.id, time.time() + delay)
 
-                # Remove roles from prior tiers
-                if new_tier and new_tier["remove"] and (member_tier_roles := [role for role in member_tier_roles if role < guild.me.top_role]):
-                    await member.remove_roles(*member_tier_roles, reason="RoleTiers: removing roles from prior tiers")
+        if not new_tier:
+            return
 
-    @_tier_checker.before_loop
-    async def _before_checker(self):
+        # Add role from new tier
+        to_add = [new_tier["role"]] if new_tier["role"] and new_tier["role"] < guild.me.top_role else []
+
+        # Remove roles from prior tiers
+        to_remove = [role for role in member_tier_roles if role < guild.me.top_role] if new_tier["remove"] else []
+
+        if to_add or to_remove:
+            self._queue_role_edit(guild.id, member.id, to_add, to_remove)
+
+    def _queue_role_edit(self, guild_id: int, member_id: int, to_add: list, to_remove: list):
+
+        # Coalesce with any pending update for the member (later changes win)
+        edits = self._role_edits.setdefault(guild_id, {})
+        if pending := edits.get(member_id):
+            pending[0].difference_update(to_remove)
+            pending[1].difference_update(to_add)
+            pending[0].update(to_add)
+            pending[1].update(to_remove)
+        else:
+            edits[member_id] = (set(to_add), set(to_remove))
+
+        # Start workers as needed
+        workers = self._role_workers.setdefault(guild_id, set())
+        while len(workers) < min(ROLE_EDIT_CONCURRENCY, len(edits)):
+            workers.add(asyncio.create_task(self._role_edit_worker(guild_id)))
+
+    async def _role_edit_worker(self, guild_id: int):
+        edits = self._role_edits[guild_id]
+        stats = self._role_edit_stats.setdefault(guild_id, {"done": 0, "failed": 0})
+        try:
+            while edits:
+                member_id = next(iter(edits))
+                to_add, to_remove = edits.pop(member_id)
+                try:
+                    edited = await self._edit_roles(guild_id, member_id, to_add, to_remove)
+                except Exception:
+                    log.exception(f"Error while updating tier roles for member {member_id} in guild {guild_id}")
+                    edited = False
+                stats["done" if edited else "failed"] += 1
+        finally:
+            self._role_workers[guild_id].discard(asyncio.current_task())
+
+    async def _edit_roles(self, guild_id: int, member_id: int, to_add: set, to_remove: set) -> bool:
+        for attempt in range(ROLE_EDIT_ATTEMPTS):
+            if not ((guild := self.bot.get_guild(guild_id)) and (member := guild.get_member(member_id))):
+                return False
+
+            # Add and remove in a single request, based on the member's current roles
+            current = [r for r in member.roles if not r.is_default()]
+            roles = [r for r in current if r not in to_remove] + [r for r in to_add if r not in current]
+            if set(roles) == set(current):
+                return True
+
+            try:
+                await member.edit(roles=roles, reason="RoleTiers: member reached new tier")
+                return True
+            except (discord.Forbidden, discord.NotFound):
+                return False
+            except discord.HTTPException as e:
+                # Back off (respecting Retry-After when ratelimited) and try again
+                if e.status == 429:
+                    delay = float(e.response.headers.get("Retry-After", 2 ** attempt))
+                else:
+                    delay = 2 ** attempt + random.random()
+                await asyncio.sleep(delay)
+        return False
+
+    def _schedule_check(self, guild_id: int, member_id: int, due: float):
+        if (current := self._check_due.get((guild_id, member_id))) is not None and current <= due:
+            return
+        self._check_due[(guild_id, member_id)] = due
+        heapq.heappush(self._check_queue, (due, guild_id, member_id))
+        if self._check_queue[0][0] == due:
+            self._check_event.set()
+
+    async def _check_scheduler(self):
         await self.bot.wait_until_red_ready()
+        while True:
+            self._check_event.clear()
+
+            # Check all members that are due
+            while self._check_queue and self._check_queue[0][0] <= time.time():
+                due, guild_id, member_id = heapq.heappop(self._check_queue)
+                if self._check_due.get((guild_id, member_id)) != due:  # Rescheduled since
+                    continue
+                del self._check_due[(guild_id, member_id)]
+
+                guild = self.bot.get_guild(guild_id)
+                if await self._can_check(guild) and (member := guild.get_member(member_id)):
+                    try:
+                        await self._check_member(guild, member, await self._guild_tiers(guild))
+                    except Exception:
+                        log.exception(f"Error while checking tiers for member {member_id} in guild {guild_id}")
+
+            # Sleep until the next check is due or a new one is scheduled
+            try:
+                await asyncio.wait_for(self._check_event.wait(), timeout=(self._check_queue[0][0] - time.time()) if self._check_queue else None)
+            except asyncio.TimeoutError:
+                pass
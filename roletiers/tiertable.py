@@ -0,0 +1,55 @@
+import typing
+from bisect import bisect_right
+
+
+class TierTable:
+    def __init__(self, tiers: list):
+        self.tiers: list = tiers  # In hierarchy order, with roles resolved
+        self.roles: typing.Dict[int, typing.Any] = {tier["role"].id: tier["role"] for tier in tiers}
+        self.role_ids: typing.Set[int] = set(self.roles)
+        self.positions: typing.Dict[int, int] = {tier["role"].id: i for i, tier in enumerate(tiers)}  # Highest position per role
+        self.messages: typing.List[int] = [tier["messages"] for tier in tiers]
+        self.hours: typing.List[int] = [tier["hours"] for tier in tiers]
+        self.windows: typing.List[typing.Optional[int]] = [tier.get("window") for tier in tiers]  # Days, or None for all-time
+        self.window_set: typing.Set[typing.Optional[int]] = set(self.windows)
+
+        # Thresholds only increase up the hierarchy (over the same message window), so qualifying tiers are a prefix and can be binary searched
+        self.monotonic: bool = len(self.window_set) == 1 and all(
+            self.messages[i] <= self.messages[i+1] and self.hours[i] <= self.hours[i+1]
+            for i in range(len(tiers) - 1)
+        )
+
+    def __bool__(self):
+        return bool(self.tiers)
+
+    # Takes the member's message count for each window in window_set, and returns their current tier roles, the new tier they qualify for and the hours at which they next qualify
+    def evaluate(self, role_ids: typing.Iterable[int], messages: typing.Dict[typing.Optional[int], int], hours: float):
+        new_tier, next_hours = None, None
+
+        if held := self.role_ids.intersection(role_ids):
+            top_held = max(map(self.positions.__getitem__, held))
+            member_tier_roles = [self.roles[r] for r in held]
+        else:
+            top_held, member_tier_roles = -1, []
+
+        if self.monotonic:
+            by_messages = bisect_right(self.messages, messages[self.windows[0]]) - 1
+            qualified = min(by_messages, bisect_right(self.hours, hours) - 1)
+            if qualified > top_held:
+                new_tier = self.tiers[qualified]
+            elif top_held + 1 <= by_messages:
+                next_hours = self.hours[top_held + 1]
+
+        else:
+            for i in range(len(self.tiers) - 1, top_held, -1):
+                if messages[self.windows[i]] >= self.messages[i]:
+                    if hours >= self.hours[i]:
+                        new_tier = self.tiers[i]
+                        break
+                    if next_hours is None or self.hours[i] < next_hours:
+                        next_hours = self.hours[i]
+
+            if new_tier:
+                next_hours = None
+
+        return member_tier_roles, new_tier, next_hours
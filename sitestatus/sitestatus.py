@@ -25,12 +25,19 @@ SOFTWARE.
 import time
 import aiohttp
 import asyncio
+import logging
 from datetime import datetime
 
 import discord
 from discord.ext import tasks
 from redbot.core import commands, Config
 
+# Probes: concurrent requests and the timeout per request in seconds
+PROBE_CONCURRENCY = 20
+PROBE_TIMEOUT = 10
+
+log = logging.getLogger("red.ob13-cogs.sitestatus")
+
 
 class SiteStatus(commands.Cog):
     """
@@ -46,24 +53,84 @@ class SiteStatus(commands.Cog):
             "sites": {}
         }
         self.config.register_guild(**default_guild)
+
+        # One pooled session for all probes, timing each request's phases
+        self._session: aiohttp.ClientSession = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=PROBE_CONCURRENCY),
+            timeout=aiohttp.ClientTimeout(total=PROBE_TIMEOUT),
+            trace_configs=[self._trace_config()]
+        )
+        self._probe_semaphore: asyncio.Semaphore = asyncio.Semaphore(PROBE_CONCURRENCY)
+
         self._fetch_statuses.start()
 
     def cog_unload(self):
         self._fetch_statuses.cancel()
+        self.bot.loop.create_task(self._session.close())
+
+    @staticmethod
+    def _trace_config() -> aiohttp.TraceConfig:
+        # Record when each phase of a request starts/ends into the dict passed as its trace_request_ctx
+        def mark(key: str):
+            async def on_signal(session, trace_config_ctx, params):
+                if trace_config_ctx.trace_request_ctx is not None:
+                    trace_config_ctx.trace_request_ctx[key] = time.perf_counter()
+            return on_signal
+
+        trace_config = aiohttp.TraceConfig()
+        for signal, key in (
+                (trace_config.on_request_start, "start"),
+                (trace_config.on_connection_queued_start, "queued_start"),
+                (trace_config.on_connection_queued_end, "queued_end"),
+                (trace_config.on_connection_create_start, "connect_start"),
+                (trace_config.on_dns_resolvehost_start, "dns_start"),
+                (trace_config.on_dns_resolvehost_end, "dns_end"),
+                (trace_config.on_connection_create_end, "connect_end"),
+                (trace_config.on_connection_reuseconn, "reused"),
+                (trace_config.on_request_end, "end")
+        ):
+            signal.append(mark(key))
+        return trace_config
+
+    @staticmethod
+    def _timings(marks: dict):
+        # Seconds spent resolving DNS, connecting (TCP + TLS), waiting for the first byte of the response, and in total (excluding waiting for a free connection)
+        if not ("start" in marks and "end" in marks):
+            return None
+        dns = marks["dns_end"] - marks["dns_start"] if "dns_end" in marks and "dns_start" in marks else 0.0
+        connect = marks["connect_end"] - marks["connect_start"] - dns if "connect_end" in marks and "connect_start" in marks else 0.0
+        ready = marks.get("connect_end") or marks.get("reused") or marks.get("queued_end") or marks["start"]
+        queued = marks["queued_end"] - marks["queued_start"] if "queued_end" in marks and "queued_start" in marks else 0.0
+        return {
+            "dns": dns,
+            "connect": connect,
+            "ttfb": marks["end"] - ready,
+            "latency": marks["end"] - marks["start"] - queued
+        }
+
+    @staticmethod
+    def _format_timings(timings: dict):
+        return f"DNS `{round(timings['dns'] * 1000)}`ms, connect `{round(timings['connect'] * 1000)}`ms, first byte `{round(timings['ttfb'] * 1000)}`ms"
+
+    async def _send_status(self, ctx: commands.Context, url: str) -> bool:
+        # Probe the URL and send its status and timings (False if it could not be reached)
+        try:
+            marks = {}
+            async with self._session.head(url, trace_request_ctx=marks) as response:
+                timings = self._timings(marks)
+                await ctx.maybe_send_embed(f"Site returned status `{response.status} {response.reason}` with latency `{round(timings['latency'], 1)}`s ({self._format_timings(timings)}).")
+                return True
+        except (aiohttp.InvalidURL, aiohttp.ClientConnectorError, asyncio.TimeoutError):
+            await ctx.send("There was an error connecting to this site. Is the url valid?")
+            return False
 
     @commands.command(name="getstatus")
     async def _get_status(self, ctx: commands.Context, url: str):
         """Get the current status of a website."""
         await ctx.trigger_typing()
-        try:
-            if url[0] == "<" and url[-1] == ">":
-                url = url[1:-1]
-            async with aiohttp.ClientSession() as session:
-                start = time.perf_counter()
-                async with session.head(url) as response:
-                    return await ctx.maybe_send_embed(f"Site returned status `{response.status} {response.reason}` with latency `{round(time.perf_counter() - start, 1)}`s.")
-        except (aiohttp.InvalidURL, aiohttp.ClientConnectorError):
-            return await ctx.send("There was an error connecting to this site. Is the url valid?")
+        if url[0] == "<" and url[-1] == ">":
+            url = url[1:-1]
+        await self._send_status(ctx, url)
 
     @commands.guild_only()
     @commands.admin_or_permissions(administrator=True)
@@ -75,15 +142,10 @@ class SiteStatus(commands.Cog):
     async def _site_status_add(self, ctx: commands.Context, sitename: str, url: str):
         """Set up SiteStatus to monitor a website."""
         async with ctx.typing():
-            async with self.config.guild(ctx.guild).sites() as sites:
-                try:
-                    async with aiohttp.ClientSession() as session:
-                        start = time.perf_counter()
-                        async with session.head(url) as response:
-                            await ctx.maybe_send_embed(f"Site returned status `{response.status} {response.reason}` with latency `{round(time.perf_counter() - start, 1)}`s.")
-                except (aiohttp.InvalidURL, aiohttp.ClientConnectorError):
-                    return await ctx.send("There was an error connecting to this site. Is the url valid?")
+            if not await self._send_status(ctx, url):
+                return
 
+            async with self.config.guild(ctx.guild).sites() as sites:
                 sites[sitename] = {
                     "url": url,
                     "status": 200,
@@ -100,18 +162,15 @@ class SiteStatus(commands.Cog):
     async def _site_status_edit(self, ctx: commands.Context, sitename: str, url: str):
         """Edit the URL a SiteStatus monitored website."""
         async with ctx.typing():
-            async with self.config.guild(ctx.guild).sites() as sites:
-                if sitename not in sites.keys():
-                    return await ctx.send("There was no monitored website found with that name!")
+            if sitename not in await self.config.guild(ctx.guild).sites():
+                return await ctx.send("There was no monitored website found with that name!")
 
-                try:
-                    async with aiohttp.ClientSession() as session:
-                        start = time.perf_counter()
-                        async with session.head(url) as response:
-                            await ctx.maybe_send_embed(f"Site returned status `{response.status} {response.reason}` with latency `{round(time.perf_counter() - start, 1)}`s.")
-                except (aiohttp.InvalidURL, aiohttp.ClientConnectorError):
-                    return await ctx.send("There was an error connecting to this site. Is the url valid?")
+            if not await self._send_status(ctx, url):
+                return
 
+            async with self.config.guild(ctx.guild).sites() as sites:
+                if sitename not in sites.keys():  # Removed while probing
+                    return await ctx.send("There was no monitored website found with that name!")
                 sites[sitename]["url"] = url
         return await ctx.tick()
 
@@ -169,6 +228,7 @@ class SiteStatus(commands.Cog):
         `{status}` to display the HTTP status code received
         `{reason}` to display the meaning behind the HTTP status code
         `{latency}` to display the latency of the request (in the form of `x.x` seconds)
+        `{dns}`, `{connect}` and `{ttfb}` to display the time taken to resolve DNS, to connect (including the TLS handshake) and until the first byte of the response (in milliseconds)
         """
         async with self.config.guild(ctx.guild).sites() as sites:
             if sitename not in sites.keys():
@@ -186,6 +246,7 @@ class SiteStatus(commands.Cog):
         `{status}` to display the HTTP status code received
         `{reason}` to display the meaning behind the HTTP status code
         `{latency}` to display the latency of the request (in the form of `x.x` seconds)
+        `{dns}`, `{connect}` and `{ttfb}` to display the time taken to resolve DNS, to connect (including the TLS handshake) and until the first byte of the response (in milliseconds)
         """
         async with self.config.guild(ctx.guild).sites() as sites:
             if sitename not in sites.keys():
@@ -218,98 +279,127 @@ class SiteStatus(commands.Cog):
     @tasks.loop(minutes=5)
     async def _fetch_statuses(self):
         all_guilds = await self.config.all_guilds()
-        for guild in all_guilds:
-            async with self.config.guild(self.bot.get_guild(guild)).sites() as sites:
-                for name, site in sites.items():
-                    if not(site["channel"] or site["notify_channel"] or site["notify_role"]):
-                        continue
-                    try:
-                        async with aiohttp.ClientSession() as session:
-                            start = time.perf_counter()
-                            async with session.head(site['url']) as response:
-                                latency = time.perf_counter() - start
-                                code = (response.status, response.reason)
-                    except (aiohttp.InvalidURL, aiohttp.ClientConnectorError):
-                        latency = None
-                        code = (500, "Internal Server Error")
-
-                    # If monitoring channel set up, then update name if necessary
-                    if site["channel"]:
-                        channel = self.bot.get_channel(site["channel"])
-                        if channel and channel.permissions_for(channel.guild.me).manage_channels:
-                            online = site['online'] or "ONLINE"
-                            offline = site['offline'] or "OFFLINE"
-
-                            online_filled = await self._fill_template(online, code, latency)
-                            offline_filled = await self._fill_template(offline, code, latency)
-
-                            try:
-                                if code[0] == site["status"]:
-                                    if channel.name != online_filled:  # Edit if necessary
-                                        await asyncio.wait_for(
-                                            channel.edit(
-                                                name=online_filled,
-                                                reason="SiteStatus: site is online"
-                                            ),
-                                            timeout=5
-                                        )
-                                else:
-                                    if channel.name != offline_filled:  # Edit if necessary
-                                        await asyncio.wait_for(
-                                            channel.edit(
-                                                name=offline_filled,
-                                                reason="SiteStatus: site is offline"
-                                            ),
-                                            timeout=5
-                                        )
-                            except asyncio.TimeoutError:
-                                pass
-
-                    # If notifications set up, then send message if necessary
-                    if site["notify_channel"] and site["notify_role"]:
-                        notify_channel = self.bot.get_channel(site["notify_channel"])
-                        notify_role = self.bot.get_guild(guild).get_role(site["notify_role"])
-                        if notify_channel and notify_role:
-                            if code[0] != site["status"] and not site.get("last"):
-                                await self._maybe_send_embed(
-                                    channel=notify_channel,
-                                    role=notify_role,
-                                    site=(name, site['url']),
-                                    message=f"is currently offline with status code `{code[0]} {code[1]}`!",
-                                    color=discord.Color.red()
-                                )
-                            elif code[0] == site["status"] and site.get("last"):
-                                downtime = round((time.time() - site.get("last")) / 60, 1)
-                                await self._maybe_send_embed(
-                                    channel=notify_channel,
-                                    role=notify_role,
-                                    site=(name, site['url']),
-                                    message=f"is back online! It was down for roughly {downtime} minutes.",
-                                    color=discord.Color.green()
-                                )
-
-                    # Set the "last" status
-                    if not site.get("last"):
-                        site["last"] = None if code[0] == site["status"] else time.time()
-                    elif code[0] == site["status"]:
-                        site["last"] = None
+
+        # Probe all monitored sites concurrently
+        to_probe = []
+        for guild_id, guild_config in all_guilds.items():
+            if not (guild := self.bot.get_guild(guild_id)):
+                continue
+            for name, site in guild_config["sites"].items():
+                if site["channel"] or site["notify_channel"] or site["notify_role"]:
+                    to_probe.append((guild, name, site))
+        results = await asyncio.gather(*(self._probe(site["url"]) for __, __, site in to_probe))
+
+        # Update channels & send notifications ("last" statuses are written to config together below)
+        last_updates = {}
+        for (guild, name, site), (code, timings) in zip(to_probe, results):
+
+            try:
+                # If monitoring channel set up, then update name if necessary
+                if site["channel"]:
+                    channel = self.bot.get_channel(site["channel"])
+                    if channel and channel.permissions_for(channel.guild.me).manage_channels:
+                        online = site['online'] or "ONLINE"
+                        offline = site['offline'] or "OFFLINE"
+
+                        online_filled = await self._fill_template(online, code, timings)
+                        offline_filled = await self._fill_template(offline, code, timings)
+
+                        try:
+                            if code[0] == site["status"]:
+                                if channel.name != online_filled:  # Edit if necessary
+                                    await asyncio.wait_for(
+                                        channel.edit(
+                                            name=online_filled,
+                                            reason="SiteStatus: site is online"
+                                        ),
+                                        timeout=5
+                                    )
+                            else:
+                                if channel.name != offline_filled:  # Edit if necessary
+                                    await asyncio.wait_for(
+                                        channel.edit(
+                                            name=offline_filled,
+                                            reason="SiteStatus: site is offline"
+                                        ),
+                                        timeout=5
+                                    )
+                        except (asyncio.TimeoutError, discord.HTTPException):  # Still send notifications below
+                            pass
+
+                # If notifications set up, then send message if necessary
+                if site["notify_channel"] and site["notify_role"]:
+                    notify_channel = self.bot.get_channel(site["notify_channel"])
+                    notify_role = guild.get_role(site["notify_role"])
+                    if notify_channel and notify_role:
+                        if code[0] != site["status"] and not site.get("last"):
+                            await self._maybe_send_embed(
+                                channel=notify_channel,
+                                role=notify_role,
+                                site=(name, site['url']),
+                                message=f"is currently offline with status code `{code[0]} {code[1]}`!",
+                                color=discord.Color.red(),
+                                timings=timings
+                            )
+                        elif code[0] == site["status"] and site.get("last"):
+                            downtime = round((time.time() - site.get("last")) / 60, 1)
+                            await self._maybe_send_embed(
+                                channel=notify_channel,
+                                role=notify_role,
+                                site=(name, site['url']),
+                                message=f"is back online! It was down for roughly {downtime} minutes.",
+                                color=discord.Color.green(),
+                                timings=timings
+                            )
+
+            except Exception:
+                # Keep going, so the other sites are updated and the statuses below are still saved (no repeated alerts next time)
+                log.exception(f"Error while updating SiteStatus site {name} in guild {guild.id}")
+
+            # Set the "last" status
+            if not site.get("last") and code[0] != site["status"]:
+                last_updates.setdefault(guild.id, {})[name] = (site["url"], time.time())
+            elif site.get("last") and code[0] == site["status"]:
+                last_updates.setdefault(guild.id, {})[name] = (site["url"], None)
+
+        # Write changed statuses, one write per guild (unless the site was removed or its URL changed meanwhile)
+        for guild_id, updates in last_updates.items():
+            try:
+                async with self.config.guild_from_id(guild_id).sites() as sites:
+                    for name, (url, last) in updates.items():
+                        if (site := sites.get(name)) and site["url"] == url:
+                            site["last"] = last
+            except Exception:
+                log.exception(f"Error while saving SiteStatus statuses for guild {guild_id}")
+
+    async def _probe(self, url: str):
+        async with self._probe_semaphore:
+            try:
+                marks = {}
+                async with self._session.head(url, trace_request_ctx=marks) as response:
+                    return (response.status, response.reason), self._timings(marks)
+            except (aiohttp.InvalidURL, aiohttp.ClientError, asyncio.TimeoutError):
+                return (500, "Internal Server Error"), None
 
     @_fetch_statuses.before_loop
     async def _before_fetch_statuses(self):
         await self.bot.wait_until_red_ready()
 
     @staticmethod
-    async def _fill_template(template, code, lat):
-        return template.replace(
+    async def _fill_template(template, code, timings):
+        template = template.replace(
             "{status}", str(code[0])
         ).replace(
             "{reason}", code[1]
         ).replace(
-            "{latency}", f"{round(lat, 1)}s" if isinstance(lat, float) else "N/A"
+            "{latency}", f"{round(timings['latency'], 1)}s" if timings else "N/A"
         )
+        for phase in ("dns", "connect", "ttfb"):
+            template = template.replace("{" + phase + "}", f"{round(timings[phase] * 1000)}ms" if timings else "N/A")
+        return template
 
     @staticmethod
-    async def _maybe_send_embed(channel: discord.TextChannel, role: discord.Role, site: tuple, message: str, color: discord.Color):
+    async def _maybe_send_embed(channel: discord.TextChannel, role: discord.Role, site: tuple, message: str, color: discord.Color, timings: dict = None):
         channel_permissions = channel.permissions_for(channel.guild.me)
         if not channel_permissions.send_messages or not (role.mentionable or channel.guild.me.guild_permissions.mention_everyone):
             return
@@ -319,7 +409,7 @@ class SiteStatus(commands.Cog):
                 allowed_mentions=discord.AllowedMentions(roles=True),
                 embed=discord.Embed(
                     title="SiteStatus Alert",
-                    description=f"[{site[0]}]({site[1]}) {message}",
+                    description=f"[{site[0]}]({site[1]}) {message}" + (f"\n\n**Latency:** `{round(timings['latency'], 1)}`s ({SiteStatus._format_timings(timings)})" if timings else ""),
                     color=color,
                     timestamp=datetime.utcnow()
                 )